@@ -2,7 +2,7 @@ from flask import Flask, jsonify, send_from_directory
 from .config import Config
 import uuid
 import os
-from .database import db
+from .database import db, upgrade_schema
 
 # Import Blueprints
 from .routes.auth_routes import auth_bp, init_oauth
@@ -16,8 +16,12 @@ from .routes.utility_routes import utility_bp
 from .routes.interview_routes import interview_bp
 from .routes.timeline_routes import timeline_bp
 from .routes.matching_routes import matching_bp
+from .services.matching_service import matching_service
+from .services.task_queue import task_queue
+from .services.explanation_store import explanation_store
+from .services.scoring_pool import in_main_process
 
-from .models import User, Job, Profile, Experience, Application, Employee, Performance, Analytics, ChatMessage
+from .models import User, Job, Profile, Experience, Application, Employee, Performance, Analytics, ChatMessage, MatchScore, ParsedResume, ResumeIngestion
 
 def create_app():
     app = Flask(__name__)
@@ -31,6 +35,7 @@ def create_app():
 
     with app.app_context():
         db.create_all()
+        upgrade_schema()
 
     # Register Blueprints
     # Note: url_prefix='/api' is common. Some routes might define their own paths if needed,
@@ -54,4 +59,13 @@ def create_app():
     # Initialize OAuth
     init_oauth(app)
 
+    # Background worker for score recomputation and other deferred work
+    task_queue.init_app(app)
+    explanation_store.init_app(app)
+
+    # Load the matching model in the background instead of blocking startup.
+    # Never from a worker process: it would try to start pools of its own
+    if app.config.get('SPACY_EAGER_LOAD') and in_main_process():
+        matching_service.warm_up()
+
     return app
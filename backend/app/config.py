@@ -6,4 +6,95 @@ load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../.env'))
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    SECRET_KEY = os.getenv('SECRET_KEY')
\ No newline at end of file
+    SECRET_KEY = os.getenv('SECRET_KEY')
+
+    # Matching engine: spaCy model, components excluded at load time, and whether to
+    # load it in a background thread at startup (otherwise on first scoring use)
+    SPACY_MODEL = os.getenv('SPACY_MODEL', 'en_core_web_md')
+    SPACY_EXCLUDE = [c.strip() for c in os.getenv('SPACY_EXCLUDE', 'parser,ner').split(',') if c.strip()]
+    SPACY_EAGER_LOAD = os.getenv('SPACY_EAGER_LOAD', 'true').lower() in ('1', 'true', 'yes')
+
+    # Max number of jobs whose spaCy features are kept in memory
+    JOB_FEATURE_CACHE_SIZE = int(os.getenv('JOB_FEATURE_CACHE_SIZE', 2048))
+    # Max number of candidate profiles / parsed resumes whose features are kept in memory
+    PROFILE_FEATURE_CACHE_SIZE = int(os.getenv('PROFILE_FEATURE_CACHE_SIZE', 1024))
+    # Bulk featurization with nlp.pipe (n_process > 1 forks extra spaCy workers)
+    SPACY_BATCH_SIZE = int(os.getenv('SPACY_BATCH_SIZE', 64))
+    SPACY_N_PROCESS = int(os.getenv('SPACY_N_PROCESS', 1))
+    # Optional process pool for spaCy featurization (0 = score in-process only)
+    SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', 0))
+    SCORING_MAX_QUEUE = int(os.getenv('SCORING_MAX_QUEUE', 32))
+    SCORING_TIMEOUT = int(os.getenv('SCORING_TIMEOUT', 30))
+    SCORING_START_METHOD = os.getenv('SCORING_START_METHOD', 'spawn')
+
+    # Approximate nearest-neighbour shortlist for recommendations on large job boards.
+    # ANN_N_PROBE trades recall for latency; ANN_CANDIDATES jobs are re-ranked exactly.
+    ANN_MIN_JOBS = int(os.getenv('ANN_MIN_JOBS', 5000))
+    ANN_CANDIDATES = int(os.getenv('ANN_CANDIDATES', 200))
+    ANN_N_PROBE = int(os.getenv('ANN_N_PROBE', 8))
+    ANN_TRAIN_THRESHOLD = int(os.getenv('ANN_TRAIN_THRESHOLD', 1024))
+
+    # Reverse matching (all candidates for one job): full re-hash interval, in seconds.
+    # Profile edits made through this process are picked up immediately.
+    CANDIDATE_INDEX_RESYNC_SECONDS = int(os.getenv('CANDIDATE_INDEX_RESYNC_SECONDS', 300))
+
+    # Resume text extraction: parallel page ranges across worker processes (defaults to
+    # one per core, up to 8), PDF backend (pypdf, pdfminer, pymupdf) and per-call limits
+    RESUME_EXTRACT_WORKERS = int(os.getenv('RESUME_EXTRACT_WORKERS', min(os.cpu_count() or 1, 8)))
+    RESUME_EXTRACT_DEADLINE = int(os.getenv('RESUME_EXTRACT_DEADLINE', 30))
+    PDF_BACKEND = os.getenv('PDF_BACKEND', 'pypdf')
+    PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 20))
+    PDF_MAX_BYTES = int(os.getenv('PDF_MAX_BYTES', 10 * 1024 * 1024))
+    PDF_PAGES_PER_TASK = int(os.getenv('PDF_PAGES_PER_TASK', 4))
+    # Extracted resume text, cached by SHA-256 of the file (in memory + on disk next to uploads/)
+    RESUME_TEXT_CACHE_DIR = os.getenv('RESUME_TEXT_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'text_cache'))
+    RESUME_TEXT_CACHE_SIZE = int(os.getenv('RESUME_TEXT_CACHE_SIZE', 256))
+
+    # Persistent LLM response cache (SQLite file); TTL in seconds, LRU-evicted beyond max entries
+    LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', os.path.join(os.path.dirname(__file__), 'llm_cache.sqlite3'))
+    LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', 5000))
+
+    # LLM provider circuit breakers: rolling window (seconds), minimum calls before tripping,
+    # failure share that opens the breaker (calls slower than SLOW_CALL_SECONDS count as
+    # failures) and how long an open breaker skips the provider before a half-open probe
+    LLM_BREAKER_WINDOW = int(os.getenv('LLM_BREAKER_WINDOW', 60))
+    LLM_BREAKER_MIN_CALLS = int(os.getenv('LLM_BREAKER_MIN_CALLS', 5))
+    LLM_BREAKER_FAILURE_RATE = float(os.getenv('LLM_BREAKER_FAILURE_RATE', 0.5))
+    LLM_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('LLM_BREAKER_SLOW_CALL_SECONDS', 20))
+    LLM_BREAKER_OPEN_SECONDS = int(os.getenv('LLM_BREAKER_OPEN_SECONDS', 30))
+
+    # LLM request hedging: endpoints (comma separated) where a slow primary provider is
+    # raced against the fallback. The hedge fires after the given percentile of the
+    # primary's recent latencies, clamped to [MIN_DELAY, MAX_DELAY] seconds
+    LLM_HEDGE_ENDPOINTS = [e.strip() for e in os.getenv('LLM_HEDGE_ENDPOINTS', 'chat').split(',') if e.strip()]
+    LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', 0.95))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', 1.0))
+    LLM_HEDGE_MAX_DELAY = float(os.getenv('LLM_HEDGE_MAX_DELAY', 6.0))
+    LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', 20))
+
+    # Batched match explanations: prompt budget in (estimated) tokens, candidates per prompt,
+    # characters of each profile included and how many prompts run at once. Whole-job runs
+    # (POST /hr/jobs/<id>/explanations) use their own EXPLANATION_JOB_WORKERS threads, not the task queue
+    EXPLANATION_BATCH_TOKENS = int(os.getenv('EXPLANATION_BATCH_TOKENS', 6000))
+    EXPLANATION_BATCH_SIZE = int(os.getenv('EXPLANATION_BATCH_SIZE', 10))
+    EXPLANATION_PROFILE_CHARS = int(os.getenv('EXPLANATION_PROFILE_CHARS', 1500))
+    EXPLANATION_CONCURRENCY = int(os.getenv('EXPLANATION_CONCURRENCY', 4))
+    EXPLANATION_JOB_WORKERS = int(os.getenv('EXPLANATION_JOB_WORKERS', 2))
+
+    # Chat data queries: token budget for the live database context and the most rows
+    # read from any table (most recent first) before relevance trimming
+    CHAT_CONTEXT_TOKEN_BUDGET = int(os.getenv('CHAT_CONTEXT_TOKEN_BUDGET', 3000))
+    CHAT_CONTEXT_MAX_ROWS = int(os.getenv('CHAT_CONTEXT_MAX_ROWS', 1000))
+
+    # Retrieval-augmented chat: how many knowledge-base sections, jobs and applications
+    # (most similar to the question by word vectors) are put into each chat prompt
+    CHAT_RETRIEVAL_ENABLED = os.getenv('CHAT_RETRIEVAL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    CHAT_RETRIEVAL_TOP_K_KB = int(os.getenv('CHAT_RETRIEVAL_TOP_K_KB', 3))
+    CHAT_RETRIEVAL_TOP_K_JOBS = int(os.getenv('CHAT_RETRIEVAL_TOP_K_JOBS', 5))
+    CHAT_RETRIEVAL_TOP_K_APPLICATIONS = int(os.getenv('CHAT_RETRIEVAL_TOP_K_APPLICATIONS', 5))
+
+    # Chat intent matcher: job titles are updated on every job write; this full reload
+    # also picks up jobs changed by other server processes
+    INTENT_MATCHER_RESYNC_SECONDS = int(os.getenv('INTENT_MATCHER_RESYNC_SECONDS', 300))
@@ -1,3 +1,22 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 
 db = SQLAlchemy()
+
+# Columns added to existing tables after their first release: (table, column, DDL).
+# db.create_all() only creates missing tables, so these are added by upgrade_schema()
+ADDED_COLUMNS = [
+    ('applications', 'score_status', "VARCHAR(20) NOT NULL DEFAULT 'final'"),
+]
+
+def upgrade_schema():
+    """Adds any of ADDED_COLUMNS missing from an existing database. Safe to run on every start."""
+    inspector = inspect(db.engine)
+    tables = set(inspector.get_table_names())
+    for table, column, ddl in ADDED_COLUMNS:
+        if table not in tables:
+            continue
+        if column not in {c['name'] for c in inspector.get_columns(table)}:
+            print(f"Adding column {table}.{column}...")
+            with db.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
@@ -1,5 +1,10 @@
 from .models import Job, Application, Employee, User, Interview, Profile, Education, Experience
-import json
+from .database import db
+from .config import Config
+from .services.intent_matcher import IntentMatcher
+from .services.text_utils import estimate_tokens
+import csv
+import io
 import re
 
 # --- KNOWLEDGE BASES ---
@@ -39,6 +44,22 @@ HireHero Application Knowledge Base for HR Professionals:
 - Core Data: You can query details about your posted jobs (status, applicant counts) and your hired employees (performance, roles).
 """
 
+# --- INTENT KEYWORDS ---
+
+# Substrings of the (lower-cased) chat message that trigger each data lookup
+INTENT_KEYWORDS = {
+    'employees': ['employees', 'my employees', 'hired', 'team', 'staff', 'people i manage', 'work for me'],
+    'my_jobs': ['jobs', 'my jobs', 'posted jobs', 'listings', 'positions i created', 'my openings'],
+    'job_fit': ['should i apply', 'am i a fit', 'good fit', 'match', 'qualified', 'chance', 'suitability'],
+    'interviews': ['interview', 'schedule', 'meeting', 'when', 'upcoming'],
+    'applications': ['application', 'status', 'applied', 'my jobs', 'track', 'update on'],
+    'market_data': ['salary', 'compensation', 'pay', 'location', 'jobs', 'list', 'average', 'range', 'companies', 'all', 'hiring'],
+    'market_context': ['job', 'role', 'position', 'company', 'developer', 'manager', 'engineer', 'analyst']
+}
+
+# One automaton over all keywords and job titles; routes keep the titles current
+intent_matcher = IntentMatcher(INTENT_KEYWORDS, resync_seconds=Config.INTENT_MATCHER_RESYNC_SECONDS)
+
 # --- UTILITIES ---
 
 def format_salary(amount, employment_type):
@@ -71,6 +92,80 @@ def format_salary(amount, employment_type):
         
     return f"{formatted}{suffix}".strip()
 
+# --- CONTEXT BUILDER ---
+
+# Words too common in chat questions to say anything about which rows are relevant
+CONTEXT_STOP_WORDS = {
+    'the', 'and', 'for', 'are', 'what', 'which', 'who', 'how', 'many', 'much', 'show', 'list', 'all',
+    'give', 'tell', 'about', 'with', 'that', 'this', 'have', 'has', 'any', 'can', 'you', 'there', 'jobs',
+    'job', 'role', 'roles', 'position', 'positions', 'company', 'companies', 'salary', 'salaries', 'pay'
+}
+
+def _csv_line(values):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='').writerow(values)
+    return buffer.getvalue()
+
+def build_table_context(title, columns, rows, user_prompt=None, budget=None):
+    """
+    Serializes rows as a compact CSV table (header once, one line per row) within a token budget.
+    rows are expected most recent first. If user_prompt is given, rows containing more of its
+    words are moved to the front (ties keep their order). Rows that do not fit are dropped and
+    a note saying how many is appended, so the model knows the list is partial.
+    Returns (context_text, report).
+    """
+    budget = budget or Config.CHAT_CONTEXT_TOKEN_BUDGET
+    cells = [["" if value is None else str(value) for value in row] for row in rows]
+
+    terms = set()
+    if user_prompt:
+        terms = {w for w in re.findall(r'[a-z0-9+#.]+', user_prompt.lower()) if len(w) > 2 and w not in CONTEXT_STOP_WORDS}
+    if terms:
+        relevance = [sum(1 for term in terms if term in " ".join(row).lower()) for row in cells]
+        cells = [cells[i] for i in sorted(range(len(cells)), key=lambda i: -relevance[i])]
+
+    lines = [f"{title} ({len(cells)} rows, CSV):", _csv_line(columns)]
+    used = estimate_tokens("\n".join(lines))
+    for row in cells:
+        line = _csv_line(row)
+        cost = estimate_tokens(line)
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+
+    included = len(lines) - 2
+    dropped = len(cells) - included
+    if dropped:
+        order = "least relevant" if terms else "oldest"
+        lines.append(f"({dropped} more rows omitted to keep the context short: the {order} ones.)")
+
+    report = {'table': title, 'rows': len(cells), 'included': included, 'dropped': dropped, 'estimated_tokens': used}
+    return "\n".join(lines), report
+
+def _data_result(title, columns, rows, user_prompt, prompt_extension, source=None):
+    context, report = build_table_context(title, columns, rows, user_prompt)
+    return {
+        'action': 'llm_with_data',
+        'source': source,
+        'context': context,
+        'context_report': report,
+        'prompt_extension': prompt_extension
+    }
+
+def _profile_summary(profile):
+    education_records = Education.query.filter_by(profile_id=profile.id).all()
+    experience_records = Experience.query.filter_by(profile_id=profile.id).all()
+
+    edu_list = [f"{e.degree} at {e.institution} ({e.start_date} - {e.end_date or 'Present'})" for e in education_records] if education_records else ["Not listed"]
+    exp_list = [f"{e.title} at {e.company} ({e.start_date} - {e.end_date or 'Present'})" for e in experience_records] if experience_records else ["Not listed"]
+
+    return f"""
+                        - Summary: {profile.summary or 'None'}
+                        - Education: {', '.join(edu_list)}
+                        - Experience: {'; '.join(exp_list)}
+                        """
+
 def handle_data_query(user, user_prompt):
     """
     Analyzes the user's role and prompt to fetch relevant data from the database.
@@ -78,105 +173,69 @@ def handle_data_query(user, user_prompt):
     - Candidate: My Applications
     - HR: My Employees, My Posted Jobs
     - Global: General Job Market Data
+    Tables are serialized by build_table_context, so the prompt stays within
+    CHAT_CONTEXT_TOKEN_BUDGET however large they grow; 'context_report' says what was dropped.
+    'source' marks the generic jobs/applications lookups that chat retrieval replaces.
     """
     prompt_lower = user_prompt.lower()
+    # Every keyword group and the longest job title mentioned, in one pass over the prompt
+    intents, mentioned_job_id = intent_matcher.match(prompt_lower)
     
     # --- HR Specific Queries ---
     if user.role == 'hr':
         # Employee / Team Queries
-        employee_keywords = ['employees', 'my employees', 'hired', 'team', 'staff', 'people i manage', 'work for me']
-        if any(k in prompt_lower for k in employee_keywords):
-            # Fetch employees hired by this HR user
-            employees = Employee.query.filter_by(hired_by=user.id).all()
+        if 'employees' in intents:
+            # Fetch employees hired by this HR user (most recent hires first)
+            employees = Employee.query.filter_by(hired_by=user.id).order_by(Employee.hired_at.desc()).limit(Config.CHAT_CONTEXT_MAX_ROWS).all()
             
             if employees:
-                emp_data = []
+                emp_rows = []
                 for emp in employees:
                     # Access the User relationship to get the name
                     name = f"{emp.user.first_name} {emp.user.last_name}" if emp.user else "Unknown User"
                     formatted_sal = format_salary(emp.salary, emp.employment_type)
-                    
-                    emp_data.append({
-                        'name': name,
-                        'role': emp.job_title,
-                        'department': emp.department,
-                        'location': emp.job_location,
-                        'salary': formatted_sal
-                    })
+                    emp_rows.append((name, emp.job_title, emp.department, emp.job_location, formatted_sal))
                 
-                context_data = json.dumps(emp_data, indent=2)
-                return {
-                    'action': 'llm_with_data',
-                    'context': f"HR's Employee Team Data:\n{context_data}",
-                    'prompt_extension': f"Based on the Employee Data below, answer the HR's query: '{user_prompt}'. Summarize the team details clearly."
-                }
+                return _data_result(
+                    "HR's Employee Team Data", ('name', 'role', 'department', 'location', 'salary'), emp_rows, user_prompt,
+                    f"Based on the Employee Data below, answer the HR's query: '{user_prompt}'. Summarize the team details clearly."
+                )
 
         # Job Posting Queries
-        my_job_keywords = ['jobs', 'my jobs', 'posted jobs', 'listings', 'positions i created', 'my openings']
-        if any(k in prompt_lower for k in my_job_keywords):
-            # Fetch jobs posted by this HR user
-            my_jobs = Job.query.filter_by(posted_by=user.id).all()
+        if 'my_jobs' in intents:
+            # Fetch jobs posted by this HR user (newest first)
+            my_jobs = Job.query.filter_by(posted_by=user.id).order_by(Job.created_at.desc()).limit(Config.CHAT_CONTEXT_MAX_ROWS).all()
             
             if my_jobs:
-                job_list = []
-                for job in my_jobs:
-                    # Calculate applicant count
-                    app_count = len(job.applications) if job.applications else 0
-                    
-                    job_list.append({
-                        'title': job.title,
-                        'company': job.company,
-                        'created_at': job.created_at.strftime("%Y-%m-%d"),
-                        'applicant_count': app_count,
-                        'status': 'Active'
-                    })
+                # Applicant counts in one grouped query instead of loading every application
+                app_counts = dict(
+                    db.session.query(Application.job_id, db.func.count(Application.id))
+                    .filter(Application.job_id.in_([job.id for job in my_jobs]))
+                    .group_by(Application.job_id).all()
+                )
+                job_rows = [
+                    (job.title, job.company, job.created_at.strftime("%Y-%m-%d"), app_counts.get(job.id, 0), 'Active')
+                    for job in my_jobs
+                ]
                 
-                context_data = json.dumps(job_list, indent=2)
-                return {
-                    'action': 'llm_with_data',
-                    'context': f"HR's Posted Jobs Data:\n{context_data}",
-                    'prompt_extension': f"Based on the Job Postings below, answer the HR's query: '{user_prompt}'. Provide an overview of their active listings and applicant traction."
-                }
+                return _data_result(
+                    "HR's Posted Jobs Data", ('title', 'company', 'created_at', 'applicant_count', 'status'), job_rows, user_prompt,
+                    f"Based on the Job Postings below, answer the HR's query: '{user_prompt}'. Provide an overview of their active listings and applicant traction."
+                )
 
     # --- Candidate Specific Queries ---
     elif user.role == 'candidate':
         # Job Fit / Career Advice Queries
-        fit_keywords = ['should i apply', 'am i a fit', 'good fit', 'match', 'qualified', 'chance', 'suitability']
-        
-        if any(k in prompt_lower for k in fit_keywords):
-            # Fetch ALL job titles
-            all_jobs = Job.query.with_entities(Job.title).all()
-            
-            # Extract plain strings from tuples and remove duplicates
-            titles = list(set([j[0] for j in all_jobs]))
-            
-            # Sort by length (descending) so we match "Senior Software Engineer" before "Software Engineer"
-            titles.sort(key=len, reverse=True)
-            
-            matched_title = None
-            for title in titles:
-                if title.lower() in prompt_lower:
-                    matched_title = title
-                    break # Stop at the first (longest) match
-            
-            if matched_title:
-                job = Job.query.filter_by(title=matched_title).first()
+        if 'job_fit' in intents:
+            # The matcher picks the longest title, so "Senior Software Engineer" wins over "Software Engineer"
+            if mentioned_job_id:
+                job = Job.query.get(mentioned_job_id)
                 profile = Profile.query.filter_by(user_id=user.id).first()
                 
                 if job:
                     if profile:
                         # Prepare data for LLM
-                        education_records = Education.query.filter_by(profile_id=profile.id).all()
-                        experience_records = Experience.query.filter_by(profile_id=profile.id).all()
-                        
-                        edu_list = [f"{e.degree} at {e.institution} ({e.start_date} - {e.end_date or 'Present'})" for e in education_records] if education_records else ["Not listed"]
-                        exp_list = [f"{e.title} at {e.company} ({e.start_date} - {e.end_date or 'Present'})" for e in experience_records] if experience_records else ["Not listed"]
-                        
-                        profile_summary = f"""
-                        - Summary: {profile.summary or 'None'}
-                        - Education: {', '.join(edu_list)}
-                        - Experience: {'; '.join(exp_list)}
-                        """
+                        profile_summary = _profile_summary(profile)
                         
                         job_details = f"""
                         - Role: {job.title}
@@ -199,105 +258,80 @@ def handle_data_query(user, user_prompt):
                         }
             else:
                 # --- General "What should I apply for?" ---
-                # Fetch ALL jobs to let AI find the best matches
-                all_jobs = Job.query.all()
+                # Fetch recent jobs to let AI find the best matches
+                all_jobs = Job.query.order_by(Job.created_at.desc()).limit(Config.CHAT_CONTEXT_MAX_ROWS).all()
                 if not all_jobs:
                     return {'action': 'llm_only'} # No jobs to recommend
                 
-                # Create a concise summary of all available jobs
-                jobs_summary = []
-                for j in all_jobs:
-                    jobs_summary.append(f"- {j.title} at {j.company} (Skills: {j.tags}, Level: {j.experience_level})")
+                profile = Profile.query.filter_by(user_id=user.id).first()
+                profile_summary = _profile_summary(profile) if profile else "No profile data entered yet."
                 
-                jobs_context_str = "\n".join(jobs_summary)
+                # Create a concise table of the available jobs, ranked by the question and the candidate's background
+                relevance_text = user_prompt
+                if profile:
+                    relevance_text = " ".join([user_prompt, profile.summary or ""] + [e.title or "" for e in profile.experiences])
+                job_rows = [(j.title, j.company, j.tags, j.experience_level) for j in all_jobs]
+                jobs_context_str, report = build_table_context(
+                    "Available Jobs List", ('title', 'company', 'skills', 'level'), job_rows, relevance_text
+                )
                 
                 return {
                     'action': 'llm_with_data',
-                    'context': f"Candidate Profile:\n{profile_summary}\n\nAvailable Jobs List:\n{jobs_context_str}",
+                    'context': f"Candidate Profile:\n{profile_summary}\n\n{jobs_context_str}",
+                    'context_report': report,
                     'prompt_extension': f"Act as a Career Advisor. The user is asking for job recommendations ('{user_prompt}'). Based on their Profile and the Available Jobs List provided above, recommend the top 3 roles they are best suited for and explain why."
                 }
                     
         # Interview Queries
-        interview_keywords = ['interview', 'schedule', 'meeting', 'when', 'upcoming']
         # Check if the query is actually about interviews
-        if any(k in prompt_lower for k in interview_keywords):
+        if 'interviews' in intents:
             # Fetch interviews for this candidate by joining with Application
             interviews = Interview.query.join(Application).filter(Application.user_id == user.id).order_by(Interview.scheduled_at.asc()).all()
             
             if interviews:
-                inv_data = []
+                inv_rows = []
                 for inv in interviews:
                     # Get Job info from the related application
                     job_title = inv.application.job.title if (inv.application and inv.application.job) else "Unknown Job"
                     company = inv.application.job.company if (inv.application and inv.application.job) else "Unknown Company"
-                    
-                    inv_data.append({
-                        'job_role': job_title,
-                        'company': company,
-                        'stage': inv.stage,
-                        'date_time': inv.scheduled_at.strftime("%Y-%m-%d %H:%M"),
-                        'type': inv.location_type,
-                        'link_or_location': inv.location_detail
-                    })
+                    inv_rows.append((job_title, company, inv.stage, inv.scheduled_at.strftime("%Y-%m-%d %H:%M"),
+                                     inv.location_type, inv.location_detail))
                 
-                context_data = json.dumps(inv_data, indent=2)
-                return {
-                    'action': 'llm_with_data',
-                    'context': f"User's Scheduled Interviews:\n{context_data}",
-                    'prompt_extension': f"Based on the Interview Schedule below, answer the user's query: '{user_prompt}'. Provide details on dates, times, and meeting links if requested."
-                }
+                return _data_result(
+                    "User's Scheduled Interviews", ('job_role', 'company', 'stage', 'date_time', 'type', 'link_or_location'),
+                    inv_rows, None, # Keep chronological order
+                    f"Based on the Interview Schedule below, answer the user's query: '{user_prompt}'. Provide details on dates, times, and meeting links if requested."
+                )
 
         # Application Status Queries
-        app_keywords = ['application', 'status', 'applied', 'my jobs', 'track', 'update on']
-        
         # Check if asking about specific application status
-        if any(k in prompt_lower for k in app_keywords):
-            applications = Application.query.filter_by(user_id=user.id).all()
+        if 'applications' in intents:
+            applications = Application.query.filter_by(user_id=user.id).order_by(Application.applied_at.desc()).limit(Config.CHAT_CONTEXT_MAX_ROWS).all()
             
             if applications:
-                app_data = []
+                app_rows = []
                 for app in applications:
                     job_title = app.job.title if app.job else "Unknown Role"
                     company_name = app.job.company if app.job else "Unknown Company"
-                    
-                    app_data.append({
-                        'job_title': job_title,
-                        'company': company_name,
-                        'status': app.status,
-                        'applied_date': app.applied_at.strftime("%Y-%m-%d") if app.applied_at else "N/A"
-                    })
+                    app_rows.append((job_title, company_name, app.status,
+                                     app.applied_at.strftime("%Y-%m-%d") if app.applied_at else "N/A"))
                 
-                context_data = json.dumps(app_data, indent=2)
-                return {
-                    'action': 'llm_with_data',
-                    'context': f"User's Application History:\n{context_data}",
-                    'prompt_extension': f"Based on the Application History below, answer: '{user_prompt}'. Give specific status updates."
-                }
+                return _data_result(
+                    "User's Application History", ('job_title', 'company', 'status', 'applied_date'), app_rows, user_prompt,
+                    f"Based on the Application History below, answer: '{user_prompt}'. Give specific status updates.",
+                    source='applications'
+                )
 
     # --- Job Market Queries (Available to all) ---
-    data_keywords = ['salary', 'compensation', 'pay', 'location', 'jobs', 'list', 'average', 'range', 'companies', 'all', 'hiring']
-    context_keywords = ['job', 'role', 'position', 'company', 'developer', 'manager', 'engineer', 'analyst']
-    
-    if any(k in prompt_lower for k in data_keywords) and any(r in prompt_lower for r in context_keywords):
-        jobs = Job.query.all() 
+    if 'market_data' in intents and 'market_context' in intents:
+        jobs = Job.query.order_by(Job.created_at.desc()).limit(Config.CHAT_CONTEXT_MAX_ROWS).all()
         
         if jobs:
-            job_data = []
-            for job in jobs:
-                formatted_salary = format_salary(job.salary, job.type)
-                job_data.append({
-                    'title': job.title,
-                    'company': job.company,
-                    'salary': formatted_salary, 
-                    'type': job.type,
-                    'location': job.location
-                })
-                
-            context_data = json.dumps(job_data, indent=2)
-            return {
-                'action': 'llm_with_data',
-                'context': f"General Job Market Data:\n{context_data}",
-                'prompt_extension': f"Based on the Job Market Data below, answer: '{user_prompt}'. Use the provided salary formats."
-            }
+            job_rows = [(job.title, job.company, format_salary(job.salary, job.type), job.type, job.location) for job in jobs]
+            return _data_result(
+                "General Job Market Data", ('title', 'company', 'salary', 'type', 'location'), job_rows, user_prompt,
+                f"Based on the Job Market Data below, answer: '{user_prompt}'. Use the provided salary formats.",
+                source='jobs'
+            )
             
     return {'action': 'llm_only'}
\ No newline at end of file
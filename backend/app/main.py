@@ -1,14 +1,19 @@
 from app import create_app
 from app.database import db
 from app.config import Config
+from app.services.scoring_pool import in_main_process
 from flask import Flask
 import os
 
-app = create_app()
+# Module-level app for `flask --app app.main` and WSGI servers (app.main:app).
+# Not built in spawned pool workers, which re-import the main module
+app = None
+if in_main_process():
+    app = create_app()
 
-# Initialize Database and Seed Data on Startup
-with app.app_context():
-    db.create_all()
+    # Initialize Database and Seed Data on Startup
+    with app.app_context():
+        db.create_all()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000, debug=True)
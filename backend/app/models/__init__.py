@@ -8,4 +8,7 @@ from .performance import Performance
 from .analytics import Analytics
 from .chat_message import ChatMessage
 from .education import Education
-from .interview import Interview
\ No newline at end of file
+from .interview import Interview
+from .match_score import MatchScore
+from .parsed_resume import ParsedResume
+from .resume_ingestion import ResumeIngestion
\ No newline at end of file
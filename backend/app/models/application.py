@@ -10,5 +10,6 @@ class Application(db.Model):
     applied_at = db.Column(db.DateTime, default=datetime.utcnow)
     match_score = db.Column(db.Float, default=0.0) # Stores 0.0 to 100.0
     match_explanation = db.Column(db.Text) # Stores JSON or text explanation from Gemini
+    score_status = db.Column(db.String(20), nullable=False, default='final', server_default='final') # 'provisional' until the resume-based rescore finishes
     user = db.relationship('User', back_populates='applications')
     job = db.relationship('Job', back_populates='applications')
@@ -0,0 +1,15 @@
+from ..database import db
+from datetime import datetime
+
+class MatchScore(db.Model):
+    __tablename__ = 'match_scores'
+    # Composite primary key doubles as the (profile_id, job_id) lookup index
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id', ondelete='CASCADE'), primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False, default=0.0) # Stores 0.0 to 100.0
+    scorer_version = db.Column(db.String(80), nullable=False)
+    profile_hash = db.Column(db.String(40), nullable=False) # Hash of the profile text that was scored
+    job_hash = db.Column(db.String(40), nullable=False) # Hash of the job title/tags/description that was scored
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    profile = db.relationship('Profile', back_populates='match_scores')
+    job = db.relationship('Job', back_populates='match_scores')
@@ -0,0 +1,10 @@
+from ..database import db
+from datetime import datetime
+
+class ParsedResume(db.Model):
+    __tablename__ = 'parsed_resumes'
+    # One LLM parse per resume text and parser prompt version
+    resume_hash = db.Column(db.String(64), primary_key=True) # SHA-256 of the extracted resume text
+    parser_version = db.Column(db.String(20), primary_key=True)
+    data = db.Column(db.Text, nullable=False) # Structured resume JSON returned by the LLM
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -14,6 +14,8 @@ class Profile(db.Model):
     user = db.relationship('User', back_populates='profile')
     experiences = db.relationship('Experience', back_populates='profile', cascade='all, delete-orphan')
     educations = db.relationship('Education', back_populates='profile', cascade='all, delete-orphan')
+    match_scores = db.relationship('MatchScore', back_populates='profile', cascade='all, delete-orphan', passive_deletes=True)
+    resume_ingestion = db.relationship('ResumeIngestion', uselist=False, back_populates='profile', cascade='all, delete-orphan', passive_deletes=True)
 
     def calculate_completeness(self):
         score = 0
@@ -0,0 +1,13 @@
+from ..database import db
+from datetime import datetime
+
+class ResumeIngestion(db.Model):
+    __tablename__ = 'resume_ingestions'
+    # Background processing state of a profile's current resume upload
+    profile_id = db.Column(db.Integer, db.ForeignKey('profiles.id', ondelete='CASCADE'), primary_key=True)
+    resume = db.Column(db.String(255), nullable=False) # Profile.resume path this state belongs to
+    status = db.Column(db.String(20), nullable=False, default='queued') # queued, extracting, parsing, featurizing, ready, failed
+    text_hash = db.Column(db.String(64)) # Key of the ParsedResume row once parsed
+    error = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    profile = db.relationship('Profile', back_populates='resume_ingestion')
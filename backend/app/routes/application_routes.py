@@ -1,11 +1,12 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from ..database import db
 from ..models import Application, User, Job
 from ..utils import get_current_user
 from ..services.matching_service import matching_service
+from ..services.score_store import score_store
+from ..services.task_queue import task_queue
+from ..services.explanation_store import explanation_store
 import json
-import os
-from pypdf import PdfReader
 
 application_bp = Blueprint('application_bp', __name__)
 
@@ -47,61 +48,26 @@ def create_application():
     if existing:
         return jsonify({'error': 'You have already applied to this job'}), 400 # YAML says 400 for bad request
 
-    # Calculate Match Score & Explanation
-    score = 0
-    resume_text = ""
-    used_resume_file = False
-
-    # Check if a resume file exists in the profile
-    if user.profile.resume:
-        try:
-            # profile.resume is stored as "/uploads/filename"
-            # We need the physical path: current_app.root_path + /uploads/filename
-            # Strip leading slash to join correctly
-            filename = os.path.basename(user.profile.resume)
-            file_path = os.path.join(current_app.root_path, 'uploads', filename)
-            
-            if os.path.exists(file_path):
-                # Extract Text from File
-                if file_path.lower().endswith('.pdf'):
-                    reader = PdfReader(file_path)
-                    for page in reader.pages:
-                        extracted = page.extract_text()
-                        if extracted:
-                            resume_text += extracted + "\n"
-                else:
-                    # Fallback for text/md files
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        resume_text = f.read()
-                
-                # If text was successfully extracted, parse it with LLM
-                if resume_text.strip():
-                    resume_data = matching_service.parse_resume_with_llm(resume_text)
-                    if resume_data:
-                        score = matching_service.calculate_score(resume_data, job)
-                        used_resume_file = True
-                        print(f"Calculated score {score} using uploaded resume.")
-
-        except Exception as e:
-            print(f"Error parsing resume file for application: {e}")
-            # Silently fall back to profile data
-    
-    # Fallback: If no resume file or parsing failed, use the database profile
-    if not used_resume_file:
-        print("Calculating score using DB profile data.")
-        score = matching_service.calculate_score(user.profile, job)
+    # Provisional score from the (cached) DB profile features; this is the final score
+    # unless there is an uploaded resume, which is scored in the background
+    score = score_store.get_scores(user.profile, [job])[0]
+    has_resume = bool(user.profile.resume)
 
     app = Application(
         user_id=user.id,
         job_id=job_id,
         status='applied', # Default status
         match_score=score,
-        match_explanation=None
+        match_explanation=None,
+        score_status='provisional' if has_resume else 'final'
     )
     # TODO: Handle cover_letter if model supports
     db.session.add(app)
     db.session.commit()
-    return jsonify({'message': 'Application submitted successfully', 'id': app.id}), 201
+    if has_resume:
+        task_queue.enqueue(('application_score', app.id), score_store.finalize_application, app.id)
+    return jsonify({'message': 'Application submitted successfully', 'id': app.id,
+                    'match_score': app.match_score, 'score_status': app.score_status}), 201
 
 @application_bp.route('/applications/my', methods=['GET'])
 def get_my_applications():
@@ -124,7 +90,9 @@ def get_my_applications():
                 'user_id': app.user_id,
                 'job_id': app.job_id,
                 'status': app.status,
-                'applied_at': app.applied_at
+                'applied_at': app.applied_at,
+                'match_score': app.match_score,
+                'score_status': app.score_status
             },
             'job_details': {
                 'id': job.id if job else None,
@@ -244,6 +212,7 @@ def get_company_applications():
             'job_title': job.title if job else '',
             'job_description': job.description if job else '',
             'match_score': app.match_score,
+            'score_status': app.score_status,
             'match_analysis': analysis,
             'interview_details': interview_info # Added interview info
         })
@@ -317,6 +286,31 @@ def get_application_explanation(app_id):
     
     return jsonify(json.loads(explanation_json_str))
 
+@application_bp.route('/hr/jobs/<int:job_id>/explanations', methods=['POST'])
+def generate_job_explanations(job_id):
+    """Starts filling in the missing match explanations of one of the HR user's jobs in the background."""
+    user = get_current_user()
+    if not user or user.role != 'hr':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    job = Job.query.filter_by(id=job_id, posted_by=user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify(explanation_store.schedule(job)), 202
+
+@application_bp.route('/hr/jobs/<int:job_id>/explanations', methods=['GET'])
+def get_job_explanations_progress(job_id):
+    user = get_current_user()
+    if not user or user.role != 'hr':
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    job = Job.query.filter_by(id=job_id, posted_by=user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    return jsonify(explanation_store.progress(job))
+
 # --- HR - Screening & Feedback (Scaffold) ---
 
 @application_bp.route('/hr/screening-forms', methods=['POST'])
@@ -1,28 +1,43 @@
-from flask import Blueprint, request, jsonify
-from ..services.llm_service import llm_service
-from ..services.matching_service import matching_service
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from ..services.llm_service import llm_service, is_json
+from ..services.resume_extractor import resume_extractor
+from ..services.resume_store import resume_store
+from ..services.chat_retriever import chat_retriever
 from ..models import Job, Application, User, ChatMessage, Employee # Added Employee
 from ..database import db
+from ..config import Config
 from ..utils import get_current_user
 from ..genai_helpers import handle_data_query, KNOWLEDGE_BASE_HR, KNOWLEDGE_BASE_CANDIDATE
 import json
 import io
-from pypdf import PdfReader
 
 genai_bp = Blueprint('genai_bp', __name__)
 
-@genai_bp.route('/gen-ai/chat', methods=['POST'])
-def chat_with_ai():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-
-    data = request.json or {}
-    prompt = data.get('prompt')
-
-    if not prompt:
-        return jsonify({'error': 'Prompt is required'}), 400
+def _sse(event, payload):
+    """Formats one Server-Sent Events message."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
+def _sse_response(chunks, on_complete):
+    """
+    Streams LLM chunks as 'delta' events, then a 'done' event whose payload is
+    on_complete(full_text). Errors are reported as an 'error' event.
+    """
+    def generate():
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield _sse('delta', {'text': chunk})
+            yield _sse('done', on_complete("".join(parts)))
+        except Exception as e:
+            print(f"Streaming Error: {e}")
+            yield _sse('error', {'error': 'Failed to generate response'})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def _build_chat_prompts(user, prompt):
+    """Returns (system prompt, user prompt) for a chat message, including any live data."""
     # Select Role-Based Knowledge Base
     if user.role == 'hr':
         role_knowledge = KNOWLEDGE_BASE_HR
@@ -34,12 +49,19 @@ def chat_with_ai():
         role_knowledge = ""
         role_persona = "User"
 
-    # Save User Message
-    user_msg = ChatMessage(user_id=user.id, sender='user', message=prompt)
-    db.session.add(user_msg)
+    # Retrieve only the knowledge-base sections, jobs and applications relevant to the question
+    retrieved = None
+    if Config.CHAT_RETRIEVAL_ENABLED:
+        try:
+            retrieved = chat_retriever.retrieve(user, prompt)
+            role_knowledge = retrieved['knowledge']
+        except Exception as e:
+            print(f"Chat retrieval failed, using keyword lookups only: {e}")
 
     # Handle Data Queries (Delegate to helper)
     query_result = handle_data_query(user, prompt)
+    if retrieved and query_result.get('source') in ('jobs', 'applications'):
+        query_result = {'action': 'llm_only'} # Already covered by the retrieved records
     
     # Construct System and User Prompts
     system_context = f"""
@@ -53,14 +75,40 @@ def chat_with_ai():
     """
     
     user_prompt_to_llm = prompt
+
+    if retrieved and retrieved['context']:
+        system_context += f"\n\n--- RETRIEVED RECORDS (most relevant to the question) ---\n{retrieved['context']}"
     
     if query_result['action'] == 'llm_with_data':
         # Inject the fetched data
         system_context += f"\n\n--- LIVE DATABASE CONTEXT ---\n{query_result['context']}"
+        report = query_result.get('context_report')
+        if report and report['dropped']:
+            print(f"Chat context trimmed: {report}")
         user_prompt_to_llm = query_result['prompt_extension']
+
+    return system_context, user_prompt_to_llm
+
+@genai_bp.route('/gen-ai/chat', methods=['POST'])
+def chat_with_ai():
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.json or {}
+    prompt = data.get('prompt')
+
+    if not prompt:
+        return jsonify({'error': 'Prompt is required'}), 400
+
+    # Save User Message
+    user_msg = ChatMessage(user_id=user.id, sender='user', message=prompt)
+    db.session.add(user_msg)
+
+    system_context, user_prompt_to_llm = _build_chat_prompts(user, prompt)
     
-    # Generate Response
-    reply = llm_service.generate_text(system_context, user_prompt_to_llm)
+    # Generate Response (a conversation should never replay an old answer)
+    reply = llm_service.generate_text(system_context, user_prompt_to_llm, use_cache=False, endpoint='chat')
 
     # Save Bot Response
     bot_msg = ChatMessage(user_id=user.id, sender='bot', message=reply)
@@ -72,6 +120,37 @@ def chat_with_ai():
         'session_id': data.get('session_id', 'session_123'),
     })
 
+@genai_bp.route('/gen-ai/chat/stream', methods=['POST'])
+def chat_with_ai_stream():
+    """Same as /gen-ai/chat, streamed as Server-Sent Events."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.json or {}
+    prompt = data.get('prompt')
+
+    if not prompt:
+        return jsonify({'error': 'Prompt is required'}), 400
+
+    # Save User Message
+    db.session.add(ChatMessage(user_id=user.id, sender='user', message=prompt))
+    db.session.commit()
+
+    system_context, user_prompt_to_llm = _build_chat_prompts(user, prompt)
+    user_id = user.id
+
+    def on_complete(reply):
+        # Save Bot Response once the whole reply has been streamed
+        db.session.add(ChatMessage(user_id=user_id, sender='bot', message=reply))
+        db.session.commit()
+        return {'reply': reply, 'session_id': data.get('session_id', 'session_123')}
+
+    return _sse_response(
+        llm_service.generate_stream(system_context, user_prompt_to_llm, use_cache=False),
+        on_complete
+    )
+
 # --- Get Chat History ---
 @genai_bp.route('/gen-ai/history', methods=['GET'])
 def get_chat_history():
@@ -118,26 +197,17 @@ def parse_resume():
     text_content = ""
     
     try:
-        # Extract Text based on file type
-        if file.filename.lower().endswith('.pdf'):
-            try:
-                pdf_reader = PdfReader(file)
-                for page in pdf_reader.pages:
-                    text_content += page.extract_text() + "\n"
-            except Exception as e:
-                return jsonify({'error': f'Failed to parse PDF: {str(e)}'}), 400
-        else:
-            # Assume text/markdown
-            try:
-                text_content = file.read().decode('utf-8')
-            except UnicodeDecodeError:
-                return jsonify({'error': 'File format not supported. Please upload PDF or text file.'}), 400
+        # Extract Text based on file type (cached by file content, so re-uploads are free)
+        try:
+            text_content = resume_extractor.extract(file.read(), file.filename)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
         if not text_content.strip():
             return jsonify({'error': 'Could not extract text from file.'}), 400
 
         # Parse using LLM Service
-        extracted_data = matching_service.parse_resume_with_llm(text_content)
+        extracted_data = resume_store.get_parsed(text_content)
         
         return jsonify({
             'message': 'Resume parsed successfully',
@@ -182,7 +252,7 @@ def generate_jd():
     Ensure the description and requirements align with these specific details.
     """
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    response_text = llm_service.generate_text(system_prompt, user_prompt, validate=is_json)
 
     # Clean up markdown if Gemini adds it despite instructions
     if response_text.startswith("```json"):
@@ -202,20 +272,8 @@ def generate_jd():
 
     return jsonify(response_json)
 
-@genai_bp.route('/gen-ai/generate-cover-letter', methods=['POST'])
-def generate_cover_letter():
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'Unauthorized'}), 401
-
-    data = request.json
-    job_id = data.get('job_id')
-    user_notes = data.get('user_notes', '')
-
-    job = Job.query.get(job_id)
-    if not job:
-        return jsonify({'error': 'Job not found'}), 404
-
+def _build_cover_letter_prompts(user, job, user_notes):
+    """Returns (system prompt, user prompt) for a cover letter draft."""
     # Fetch user profile
     profile = user.profile
     profile_summary = profile.summary if profile else ""
@@ -243,20 +301,55 @@ def generate_cover_letter():
     3. Use placeholders ONLY for missing contact info: "[Your Address]", "[Your Phone Number]", "[Your Email]", and "[Date]".
     4. The tone should be professional and enthusiastic.
     """
+    return system_prompt, user_prompt
 
-    draft = llm_service.generate_text(system_prompt, user_prompt)
+@genai_bp.route('/gen-ai/generate-cover-letter', methods=['POST'])
+def generate_cover_letter():
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    data = request.json
+    job_id = data.get('job_id')
+    user_notes = data.get('user_notes', '')
+
+    job = Job.query.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    system_prompt, user_prompt = _build_cover_letter_prompts(user, job, user_notes)
+
+    # Fresh draft on every request, so "generate again" gives a different letter
+    draft = llm_service.generate_text(system_prompt, user_prompt, use_cache=False)
 
     return jsonify({
         'generated_draft': draft
     })
 
-@genai_bp.route('/gen-ai/generate-interview-guide', methods=['POST'])
-def generate_interview_guide():
+@genai_bp.route('/gen-ai/generate-cover-letter/stream', methods=['POST'])
+def generate_cover_letter_stream():
+    """Same as /gen-ai/generate-cover-letter, streamed as Server-Sent Events."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+
     data = request.json
-    jd_text = data.get('job_description')
+    job_id = data.get('job_id')
+    user_notes = data.get('user_notes', '')
+
+    job = Job.query.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    system_prompt, user_prompt = _build_cover_letter_prompts(user, job, user_notes)
+
+    return _sse_response(
+        llm_service.generate_stream(system_prompt, user_prompt, use_cache=False),
+        lambda draft: {'generated_draft': draft}
+    )
 
-    # UPDATED PROMPT: Explicitly ask for JSON structure
-    system_prompt = """You are an expert HR interviewer. Generate a structured interview guide in strict JSON format based on the job description.
+# UPDATED PROMPT: Explicitly ask for JSON structure
+INTERVIEW_GUIDE_PROMPT = """You are an expert HR interviewer. Generate a structured interview guide in strict JSON format based on the job description.
     The JSON must have the following keys:
     - "job_title": The extracted job title.
     - "behavioral_questions": A list of 3-5 behavioral interview questions (strings).
@@ -264,10 +357,7 @@ def generate_interview_guide():
     - "scoring_rubric": A string containing a guide on how to evaluate candidates (e.g., "1 - Poor: ..., 3 - Average: ..., 5 - Excellent: ...").
     Do not include any markdown formatting like ```json ... ```."""
 
-    user_prompt = f"JD: {jd_text}"
-
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
-
+def _parse_interview_guide(response_text):
     # Clean up markdown if Gemini adds it despite instructions
     if response_text.startswith("```json"):
         response_text = response_text.replace("```json", "").replace("```", "")
@@ -275,17 +365,42 @@ def generate_interview_guide():
         response_text = response_text.replace("```", "")
 
     try:
-        response_json = json.loads(response_text)
+        return json.loads(response_text)
     except:
          # Fallback: puts text in rubric if parsing fails, but prevents crash
-         response_json = {
+         return {
             "job_title": "Role",
             "behavioral_questions": [],
             "technical_questions": [],
             "scoring_rubric": response_text
         }
 
-    return jsonify(response_json)
+@genai_bp.route('/gen-ai/generate-interview-guide', methods=['POST'])
+def generate_interview_guide():
+    data = request.json
+    jd_text = data.get('job_description')
+
+    user_prompt = f"JD: {jd_text}"
+
+    response_text = llm_service.generate_text(INTERVIEW_GUIDE_PROMPT, user_prompt, validate=is_json)
+
+    return jsonify(_parse_interview_guide(response_text))
+
+@genai_bp.route('/gen-ai/generate-interview-guide/stream', methods=['POST'])
+def generate_interview_guide_stream():
+    """
+    Same as /gen-ai/generate-interview-guide, streamed as Server-Sent Events.
+    Deltas carry raw model output; the 'done' event carries the parsed guide.
+    """
+    data = request.json
+    jd_text = data.get('job_description')
+
+    user_prompt = f"JD: {jd_text}"
+
+    return _sse_response(
+        llm_service.generate_stream(INTERVIEW_GUIDE_PROMPT, user_prompt, validate=is_json),
+        _parse_interview_guide
+    )
 
 @genai_bp.route('/gen-ai/summarize-feedback', methods=['POST'])
 def summarize_feedback():
@@ -313,7 +428,7 @@ def summarize_feedback():
 
     user_prompt = f"Feedback Notes:\n{notes}"
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    response_text = llm_service.generate_text(system_prompt, user_prompt, validate=is_json)
 
     # Clean up markdown if Gemini adds it despite instructions
     if response_text.startswith("```json"):
@@ -356,7 +471,7 @@ def start_mock_interview():
     
     user_prompt = f"Role: {job.title}\nCompany: {job.company}\nDescription: {job.description[:500]}..."
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    response_text = llm_service.generate_text(system_prompt, user_prompt, validate=is_json)
     
     # Cleanup & Parse
     if response_text.startswith("```json"):
@@ -413,7 +528,7 @@ def submit_mock_interview():
 
     user_prompt = f"Job: {job.title}\n\nInterview Transcript:\n{transcript_text}"
 
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    response_text = llm_service.generate_text(system_prompt, user_prompt, validate=is_json)
 
     # Cleanup & Parse
     if response_text.startswith("```json"):
@@ -504,7 +619,7 @@ def generate_performance_insights():
     user_prompt = f"Performance Data Analysis:\n{stats_context}"
 
     # 4. Call AI
-    response_text = llm_service.generate_text(system_prompt, user_prompt)
+    response_text = llm_service.generate_text(system_prompt, user_prompt, validate=is_json)
 
     if response_text.startswith("```json"):
         response_text = response_text.replace("```json", "").replace("```", "")
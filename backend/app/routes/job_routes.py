@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
 from ..database import db
-from ..models import Job
+from ..models import Job, Profile, Application
 from ..utils import get_current_user
 from ..services.matching_service import matching_service
+from ..services.score_store import score_store
+from ..services.candidate_index import candidate_index
+from ..genai_helpers import intent_matcher
 import json
 
 job_bp = Blueprint('job_bp', __name__)
@@ -33,8 +36,11 @@ def get_jobs():
     user = get_current_user()
     profile = user.profile if user else None
 
+    # Read AI Match Scores for the whole page from the persisted score table
+    scores = score_store.get_scores(profile, paginated_jobs) if profile else []
+
     job_list = []
-    for job in paginated_jobs:
+    for idx, job in enumerate(paginated_jobs):
         job_data = {
             'id': job.id,
             'title': job.title,
@@ -55,14 +61,8 @@ def get_jobs():
             'applications_count': len(job.applications)
         }
 
-        # Calculate AI Match Score if user profile exists
         if profile:
-            try:
-                score = matching_service.calculate_score(profile, job)
-                job_data['match_score'] = score
-            except Exception as e:
-                print(f"Error calculating score for job {job.id}: {e}")
-                job_data['match_score'] = 0
+            job_data['match_score'] = scores[idx]
 
         job_list.append(job_data)
 
@@ -105,8 +105,10 @@ def search_jobs():
         if match:
             filtered.append(job)
 
+    scores = score_store.get_scores(profile, filtered) if profile else []
+
     job_list = []
-    for job in filtered:
+    for idx, job in enumerate(filtered):
         job_data = {
             'title': job.title,
             'company': job.company,
@@ -126,11 +128,7 @@ def search_jobs():
         }
         
         if profile:
-            try:
-                score = matching_service.calculate_score(profile, job)
-                job_data['match_score'] = score
-            except:
-                job_data['match_score'] = 0
+            job_data['match_score'] = scores[idx]
         
         job_list.append(job_data)
 
@@ -225,6 +223,8 @@ def create_job():
     )
     db.session.add(job)
     db.session.commit()
+    score_store.job_changed(job.id)
+    intent_matcher.job_saved(job)
     return jsonify({'message': 'Job created successfully', 'id': job.id}), 201
 
 @job_bp.route('/hr/jobs/<int:job_id>', methods=['PUT'])
@@ -248,6 +248,8 @@ def update_job(job_id):
     if 'application_deadline' in data: job.application_deadline = data['application_deadline']
 
     db.session.commit()
+    score_store.job_changed(job.id)
+    intent_matcher.job_saved(job)
     return jsonify({'message': 'Job updated successfully'})
 
 @job_bp.route('/hr/jobs/<int:job_id>', methods=['DELETE'])
@@ -256,8 +258,73 @@ def delete_job(job_id):
     job = Job.query.get_or_404(job_id)
     db.session.delete(job)
     db.session.commit()
+    matching_service.invalidate_job(job_id)
+    intent_matcher.job_removed(job_id)
     return jsonify({'message': 'Job deleted successfully'})
 
+@job_bp.route('/hr/jobs/<int:job_id>/candidates', methods=['GET'])
+def rank_job_candidates(job_id):
+    """Ranks every candidate profile (applied or not) against one of the HR user's jobs."""
+    user = get_current_user()
+    if not user or user.role != 'hr':
+        return jsonify({'error': 'Unauthorized: HR role required'}), 403
+
+    job = Job.query.filter_by(id=job_id, posted_by=user.id).first()
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+
+    page = max(request.args.get('page', 1, type=int), 1)
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+    # One vectorized pass over the precomputed candidate matrix
+    profile_ids, final_scores, keyword_scores, semantic_scores, lemma_sets, job_lemmas = candidate_index.rank(job)
+
+    start = (page - 1) * limit
+    page_ids = profile_ids[start:start + limit]
+    profiles = {p.id: p for p in Profile.query.filter(Profile.id.in_(page_ids)).all()} if page_ids else {}
+    applications = {
+        app.user_id: app for app in Application.query.filter(
+            Application.job_id == job.id,
+            Application.user_id.in_([p.user_id for p in profiles.values()])
+        ).all()
+    } if profiles else {}
+
+    candidates = []
+    for offset, profile_id in enumerate(page_ids):
+        idx = start + offset
+        profile = profiles.get(profile_id)
+        if not profile:
+            continue # Deleted since the index was synced
+        application = applications.get(profile.user_id)
+        candidate_lemmas = lemma_sets[idx]
+        candidates.append({
+            'rank': idx + 1,
+            'profile_id': profile.id,
+            'user_id': profile.user_id,
+            'candidate_name': f"{profile.user.first_name} {profile.user.last_name}",
+            'location': profile.location,
+            'match_score': matching_service.to_percent(final_scores[idx]),
+            'breakdown': {
+                'keyword_score': round(float(keyword_scores[idx]) * 100, 1),
+                'semantic_score': round(float(semantic_scores[idx]) * 100, 1),
+                'matched_keywords': sorted(job_lemmas & candidate_lemmas),
+                'missing_keywords': sorted(job_lemmas - candidate_lemmas)
+            },
+            'has_applied': application is not None,
+            'application_status': application.status if application else None
+        })
+
+    return jsonify({
+        'job_id': job.id,
+        'candidates': candidates,
+        'pagination': {
+            'page': page,
+            'per_page': limit,
+            'total_items': len(profile_ids),
+            'total_pages': (len(profile_ids) + limit - 1) // limit
+        }
+    })
+
 @job_bp.route('/jobs/recommendations', methods=['GET'])
 def get_job_recommendations():
     user = get_current_user()
@@ -268,37 +335,35 @@ def get_job_recommendations():
     if not profile:
         return jsonify({'error': 'Profile required for recommendations'}), 400
 
-    jobs = Job.query.all()
+    # On large boards, shortlist by vector similarity first (ANN index), then rank exactly
+    jobs = score_store.candidate_jobs(profile)
     recommended = []
 
-    for job in jobs:
-        # Calculate score locally (fast)
-        score = matching_service.calculate_score(profile, job)
-        
-        # Only recommend if score > 70% (Lowered threshold slightly to ensure results)
-        if score > 70: 
-            job_data = {
-                'id': job.id,
-                'title': job.title,
-                'company': job.company,
-                'location': job.location,
-                'type': job.type,
-                'salary': job.salary,
-                'description': job.description,
-                'experience_level': job.experience_level,
-                'education': job.education,
-                'remote_option': job.remote_option,
-                'benefits': job.benefits,
-                'tags': job.tags.split(',') if job.tags else [],
-                'match_score': score
-            }
-            recommended.append(job_data)
-
-    # Sort by score descending
-    recommended.sort(key=lambda x: x['match_score'], reverse=True)
-    
+    # Top 5 with score > 70% (Lowered threshold slightly to ensure results).
+    # Jobs that cannot reach the current top 5 are pruned before semantic scoring.
+    ranked, ranking_stats = score_store.top_k(profile, jobs, k=5, min_score=70)
+
+    for job, score in ranked:
+        job_data = {
+            'id': job.id,
+            'title': job.title,
+            'company': job.company,
+            'location': job.location,
+            'type': job.type,
+            'salary': job.salary,
+            'description': job.description,
+            'experience_level': job.experience_level,
+            'education': job.education,
+            'remote_option': job.remote_option,
+            'benefits': job.benefits,
+            'tags': job.tags.split(',') if job.tags else [],
+            'match_score': score
+        }
+        recommended.append(job_data)
+
     return jsonify({
-        'jobs': recommended[:5] # Return top 5
+        'jobs': recommended, # Already sorted by score descending
+        'ranking_stats': ranking_stats
     })
 
 # Add this endpoint to get explanation for a specific job without applying
@@ -1,9 +1,26 @@
 from flask import Blueprint, request, jsonify
-from ..services.llm_service import llm_service
+from ..services.matching_service import matching_service
+from ..services.resume_extractor import resume_extractor
 from ..utils import get_current_user
+import re
 
 matching_bp = Blueprint('matching_bp', __name__)
 
+EMAIL_PATTERN = re.compile(r'[\w.+-]+@[\w-]+\.[\w.-]+')
+YEARS_PATTERN = re.compile(r'(\d{1,2})\+?\s*(?:years|yrs)', re.IGNORECASE)
+
+
+def _guess_name(text):
+    # Resumes usually start with the candidate's name on its own line
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            if len(line.split()) <= 4 and not any(ch.isdigit() or ch == '@' for ch in line):
+                return line
+            return None
+    return None
+
+
 @matching_bp.route('/hr/matching/rank-resumes', methods=['POST'])
 def rank_resumes():
     user = get_current_user()
@@ -19,31 +36,50 @@ def rank_resumes():
     if not job_description:
          return jsonify({'error': 'Job description is required'}), 400
 
-    # Mock Ranking Logic
+    # Optional "must have" keywords; without them the whole description is used
+    job = matching_service.job_from_description(
+        job_description,
+        title=request.form.get('job_title'),
+        tags=request.form.get('skills')
+    )
+
+    # 1. Extract text from every file in parallel (one process per core)
+    files = [(resume.filename or f"resume_{idx+1}", resume.read()) for idx, resume in enumerate(resumes)]
+    texts = resume_extractor.extract_many(files)
+
+    # 2. Featurize all resumes in one batch and score them in one vectorized pass
+    final_scores, keyword_scores, semantic_scores, lemma_sets, job_lemmas = matching_service.score_texts(texts, job)
+
     ranked_candidates = []
-    for idx, resume in enumerate(resumes):
-        # In a real app, parse the PDF/DOCX content here
-        filename = resume.filename
+    for idx, ((filename, _), text) in enumerate(zip(files, texts)):
+        if not text.strip():
+            continue # Unreadable file
 
-        # Mock score based on filename length or random
-        import random
-        score = random.uniform(70, 99)
+        email = EMAIL_PATTERN.search(text)
+        years = [int(y) for y in YEARS_PATTERN.findall(text)]
+        matched = sorted(job_lemmas & lemma_sets[idx])
+        missing = sorted(job_lemmas - lemma_sets[idx])
+        score = matching_service.to_percent(final_scores[idx])
 
         ranked_candidates.append({
             'rank': 0, # To be sorted
-            'match_score': round(score, 1),
+            'match_score': score,
             'file_name': filename,
-            'parsed_name': f"Candidate {idx+1}", # Mock
-            'parsed_email': f"candidate{idx+1}@example.com",
+            'parsed_name': _guess_name(text) or f"Candidate {idx+1}",
+            'parsed_email': email.group(0) if email else None,
+            'breakdown': {
+                'keyword_score': round(float(keyword_scores[idx]) * 100, 1),
+                'semantic_score': round(float(semantic_scores[idx]) * 100, 1)
+            },
             'match_explanation': {
-                'summary': f"Good match for {filename}",
-                'matched_skills': ['Python', 'Communication'],
-                'missing_skills': ['Java'],
-                'experience_highlights': "5 years of experience."
+                'summary': f"Matches {len(matched)} of {len(job_lemmas)} key terms from the job description.",
+                'matched_skills': matched[:15],
+                'missing_skills': missing[:15],
+                'experience_highlights': f"{max(years)} years of experience." if years else None
             }
         })
 
-    # Sort by score
+    # Sort by score (stable, so equal scores keep upload order)
     ranked_candidates.sort(key=lambda x: x['match_score'], reverse=True)
 
     # Assign ranks
@@ -51,5 +87,7 @@ def rank_resumes():
         cand['rank'] = i + 1
 
     return jsonify({
-        'ranking': ranked_candidates[:10] # Top 10
+        'ranking': ranked_candidates[:10], # Top 10
+        'total_resumes': len(files),
+        'unreadable': len(files) - len(ranked_candidates)
     })
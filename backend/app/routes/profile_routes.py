@@ -3,6 +3,8 @@ from flask import current_app, Blueprint, request, jsonify, g
 from ..database import db
 from ..models import Profile, Experience, Education, User
 from ..utils import get_current_user
+from ..services.score_store import score_store
+from ..services.resume_store import resume_store
 
 profile_bp = Blueprint('profile_bp', __name__)
 
@@ -84,6 +86,7 @@ def profile_me():
     profile.calculate_completeness()
 
     db.session.commit()
+    score_store.profile_changed(profile.id)
     return jsonify({'message': 'Profile updated successfully', 'completeness': profile.completeness})
 
 
@@ -109,8 +112,24 @@ def upload_resume():
     profile.resume = f"/uploads/{filename}"
     profile.calculate_completeness()
     db.session.commit()
+    score_store.profile_changed(profile.id)
+    # Extract, parse and featurize the resume now rather than when the candidate applies
+    resume_store.schedule_ingestion(profile)
     return jsonify({'message': 'Resume uploaded successfully', 'resume_url': profile.resume, 
-                    'completeness': profile.completeness})
+                    'completeness': profile.completeness, 'ingestion': resume_store.ingestion_status(profile)})
+
+# GET /profiles/me/resume/status
+@profile_bp.route('/profiles/me/resume/status', methods=['GET'])
+def get_resume_status():
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'Unauthorized'}), 401
+    profile = user.profile
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    if not profile.resume:
+        return jsonify({'error': 'No resume uploaded'}), 404
+    return jsonify(resume_store.ingestion_status(profile))
 
 # POST /profiles/me/avatar
 @profile_bp.route('/profiles/me/avatar', methods=['POST'])
@@ -162,6 +181,7 @@ def add_my_experience():
     db.session.flush()
     profile.calculate_completeness()
     db.session.commit()
+    score_store.profile_changed(profile.id)
     return jsonify({'message': 'Experience added', 'id': e.id}), 201
 
 @profile_bp.route('/profiles/me/experiences/<int:exp_id>', methods=['PUT'])
@@ -184,6 +204,7 @@ def update_my_experience(exp_id):
 
     profile.calculate_completeness()
     db.session.commit()
+    score_store.profile_changed(profile.id)
     return jsonify({'message': 'Experience updated'})
 
 @profile_bp.route('/profiles/me/experiences/<int:exp_id>', methods=['DELETE'])
@@ -201,6 +222,7 @@ def delete_my_experience(exp_id):
     db.session.flush()
     profile.calculate_completeness()
     db.session.commit()
+    score_store.profile_changed(profile.id)
     return jsonify({'message': 'Experience deleted'})
 
 @profile_bp.route('/profiles/me/education', methods=['POST'])
@@ -223,6 +245,7 @@ def add_education():
     db.session.flush()
     profile.calculate_completeness()
     db.session.commit()
+    score_store.profile_changed(profile.id)
     return jsonify({'message': 'Education added', 'id': edu.id}), 201
 
 @profile_bp.route('/profiles/me/education/<int:edu_id>', methods=['DELETE'])
@@ -239,6 +262,7 @@ def delete_education(edu_id):
     db.session.flush()
     profile.calculate_completeness()
     db.session.commit()
+    score_store.profile_changed(profile.id)
     return jsonify({'message': 'Education deleted'})
 
 
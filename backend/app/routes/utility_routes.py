@@ -1,4 +1,12 @@
 from flask import Blueprint, jsonify, send_from_directory, current_app
+from ..services.matching_service import matching_service
+from ..services.task_queue import task_queue
+from ..services.candidate_index import candidate_index
+from ..services.resume_extractor import resume_extractor
+from ..services.resume_store import resume_store
+from ..services.llm_service import llm_service
+from ..services.chat_retriever import chat_retriever
+from ..genai_helpers import intent_matcher
 import os
 
 utility_bp = Blueprint('utility_bp', __name__)
@@ -9,10 +17,18 @@ def health_check():
 
 @utility_bp.route('/system/status', methods=['GET'])
 def get_system_status():
-    """Returns the current server instance ID."""
+    """Returns the current server instance ID and matching engine readiness."""
     return jsonify({
         'status': 'online',
-        'instance_id': current_app.config.get('SERVER_INSTANCE_ID')
+        'instance_id': current_app.config.get('SERVER_INSTANCE_ID'),
+        'matching_engine': matching_service.status(),
+        'candidate_index': candidate_index.stats(),
+        'resume_extraction': resume_extractor.stats(),
+        'resume_parser': resume_store.stats(),
+        'llm': llm_service.stats(),
+        'chat_retrieval': chat_retriever.stats(),
+        'intent_matcher': intent_matcher.stats(),
+        'background_tasks': task_queue.stats()
     })
 
 @utility_bp.route('/uploads/<path:filename>', methods=['GET'])
@@ -555,6 +555,9 @@ At {company}, we foster a culture of innovation and collaboration. We believe in
     # --- 5. Create Applications & Interviews ---
     print("\n--- Seeding Applications ---")
     
+    # Featurize every job and seeker profile in one nlp.pipe batch before scoring
+    matching_service.warm_features(jobs=all_jobs, profiles=[seeker.profile for seeker, _ in seekers])
+
     # Track interviews per HR
     hr_interview_counts = {hr.id: 0 for hr, _ in hr_users}
     js1_has_interview = False
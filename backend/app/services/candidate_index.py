@@ -0,0 +1,182 @@
+import threading
+import time
+import numpy as np
+from sqlalchemy.orm import selectinload
+from ..config import Config
+from ..database import db
+from ..models import Profile, User
+from .feature_cache import content_hash
+from .matching_service import matching_service
+
+
+class CandidateIndex:
+    """
+    Precomputed features of every candidate profile, for ranking the whole pool
+    against one job (the reverse of MatchingService.score_many).
+    Keeps a stacked profile-vector matrix and an inverted lemma -> rows index, so a
+    job is scored against all candidates with one matrix-vector product and one
+    postings lookup per job keyword.
+    Profiles reported via mark_dirty() are refreshed on the next query; a full
+    re-hash runs every CANDIDATE_INDEX_RESYNC_SECONDS to catch writes from other workers.
+    """
+    def __init__(self, resync_seconds=300):
+        self.resync_seconds = resync_seconds
+        self._lock = threading.Lock()
+        self._entries = {} # profile_id -> (text hash, TextFeatures)
+        self._dirty = set()
+        self._last_full_sync = 0.0
+        self._snapshot = None # (profile_ids, matrix, norms, lemma sets, postings, text hashes), rebuilt on change
+        self.scorer_version = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def mark_dirty(self, profile_id):
+        with self._lock:
+            self._dirty.add(profile_id)
+
+    def _candidate_ids(self):
+        rows = db.session.query(Profile.id).join(User).filter(User.role == 'candidate').all()
+        return {profile_id for (profile_id,) in rows}
+
+    def _load_profiles(self, profile_ids):
+        # Eager-load what the profile text is built from: 3 queries instead of 2 per profile
+        return Profile.query.options(
+            selectinload(Profile.experiences),
+            selectinload(Profile.educations)
+        ).filter(Profile.id.in_(list(profile_ids))).all()
+
+    def sync(self):
+        """
+        Brings the index in line with the database. Only new, edited (dirty) or, on a
+        full resync, re-hashed-and-changed profiles are featurized, in one batch.
+        Returns the number of profiles (re)featurized.
+        """
+        with self._lock:
+            version = matching_service.scorer_version
+            if version != self.scorer_version:
+                # A different model means every stored vector is obsolete
+                self._entries = {}
+                self.scorer_version = version
+
+            current_ids = self._candidate_ids()
+            changed = False
+            for profile_id in set(self._entries) - current_ids:
+                del self._entries[profile_id]
+                changed = True
+
+            now = time.time()
+            if now - self._last_full_sync >= self.resync_seconds:
+                to_check = current_ids
+                self._last_full_sync = now
+            else:
+                to_check = (current_ids - set(self._entries)) | (self._dirty & current_ids)
+            self._dirty = set()
+
+            stale = []
+            if to_check:
+                for profile in self._load_profiles(to_check):
+                    profile_text = matching_service._construct_profile_text(profile)
+                    text_hash = content_hash(profile_text)
+                    entry = self._entries.get(profile.id)
+                    if entry is None or entry[0] != text_hash:
+                        stale.append((profile.id, text_hash, profile_text))
+
+            if stale:
+                features = matching_service.featurize_batch([text for _, _, text in stale])
+                for (profile_id, text_hash, _), profile_features in zip(stale, features):
+                    self._entries[profile_id] = (text_hash, profile_features)
+                changed = True
+
+            if changed or self._snapshot is None:
+                self._snapshot = self._build_snapshot()
+            return len(stale)
+
+    def _build_snapshot(self):
+        profile_ids = sorted(self._entries)
+        features = [self._entries[profile_id][1] for profile_id in profile_ids]
+        if not features:
+            return ([], None, np.zeros(0), [], {}, [])
+
+        matrix = np.vstack([f.vector for f in features])
+        norms = np.fromiter((f.vector_norm for f in features), dtype=np.float64, count=len(features))
+        lemma_sets = [f.lemmas for f in features]
+
+        postings = {}
+        for row, lemmas in enumerate(lemma_sets):
+            for lemma in lemmas:
+                postings.setdefault(lemma, []).append(row)
+        postings = {lemma: np.array(rows, dtype=np.intp) for lemma, rows in postings.items()}
+        text_hashes = [self._entries[profile_id][0] for profile_id in profile_ids]
+        return (profile_ids, matrix, norms, lemma_sets, postings, text_hashes)
+
+    def _score(self, job):
+        """
+        Scores every indexed candidate against `job` in one vectorized pass over one snapshot.
+        Returns (snapshot, job_features, final, keyword, semantic), arrays in snapshot order.
+        """
+        self.sync()
+        snapshot = self._snapshot
+        profile_ids, matrix, norms, _, postings, _ = snapshot
+        job_features = matching_service._job_features(job)
+        n_profiles = len(profile_ids)
+        if not n_profiles:
+            empty = np.zeros(0)
+            return snapshot, job_features, empty, empty, empty
+
+        # Keyword overlap counts come from the postings: only rows sharing a lemma are touched
+        overlaps = np.zeros(n_profiles)
+        for lemma in job_features.lemmas:
+            rows = postings.get(lemma)
+            if rows is not None:
+                overlaps[rows] += 1
+        final_scores, keyword_scores, semantic_scores = matching_service.score_against_job(
+            job_features, matrix, norms, overlaps
+        )
+        return snapshot, job_features, final_scores, keyword_scores, semantic_scores
+
+    def score_job(self, job):
+        """
+        Returns [(profile_id, profile text hash, score 0 - 98), ...] for every indexed candidate.
+        The hash is MatchingService.profile_hash of the text each score was computed from.
+        """
+        snapshot, _, final_scores, _, _ = self._score(job)
+        profile_ids, text_hashes = snapshot[0], snapshot[5]
+        return [(profile_id, text_hash, matching_service.to_percent(score))
+                for profile_id, text_hash, score in zip(profile_ids, text_hashes, final_scores.tolist())]
+
+    def rank(self, job):
+        """
+        Scores every indexed candidate against `job` in one vectorized pass.
+        Returns (profile_ids, final, keyword, semantic, lemma_sets, job_lemmas),
+        arrays aligned with profile_ids and sorted best match first.
+        """
+        snapshot, job_features, final_scores, keyword_scores, semantic_scores = self._score(job)
+        profile_ids, lemma_sets = snapshot[0], snapshot[3]
+        n_profiles = len(profile_ids)
+        if not n_profiles:
+            empty = np.zeros(0)
+            return [], empty, empty, empty, [], job_features.lemmas
+
+        # Best first; ties keep profile id order so pages are stable
+        order = np.lexsort((np.arange(n_profiles), -final_scores))
+        return (
+            [profile_ids[i] for i in order],
+            final_scores[order],
+            keyword_scores[order],
+            semantic_scores[order],
+            [lemma_sets[i] for i in order],
+            job_features.lemmas
+        )
+
+    def stats(self):
+        snapshot = self._snapshot
+        return {
+            'profiles': len(self._entries),
+            'lemmas': len(snapshot[4]) if snapshot else 0,
+            'pending_updates': len(self._dirty),
+            'resync_seconds': self.resync_seconds
+        }
+
+
+candidate_index = CandidateIndex(resync_seconds=Config.CANDIDATE_INDEX_RESYNC_SECONDS)
@@ -0,0 +1,137 @@
+import threading
+import numpy as np
+from ..database import db
+from ..models import Job, Application, User
+from ..config import Config
+from ..genai_helpers import KNOWLEDGE_BASE_HR, KNOWLEDGE_BASE_CANDIDATE, build_table_context, format_salary
+from .matching_service import matching_service
+from .vector_index import IVFIndex
+
+
+def split_knowledge_base(text):
+    """
+    Splits a knowledge base into (header, sections): one section per top-level "- " bullet,
+    including its indented sub-bullets.
+    """
+    header, sections = [], []
+    for line in text.strip().splitlines():
+        if line.startswith('- '):
+            sections.append([line])
+        elif sections:
+            sections[-1].append(line)
+        else:
+            header.append(line)
+    return "\n".join(header), ["\n".join(section) for section in sections]
+
+
+class ChatRetriever:
+    """
+    Retrieval for the chat assistant: picks the top-k knowledge-base sections, jobs and
+    applications most similar to the question, so the prompt size does not grow with the tables.
+    Everything is compared by spaCy document vectors (the same vectors the matching service
+    scores with). Jobs come from matching_service.job_index, which is updated incrementally
+    whenever a job is created, edited or deleted; applications are ranked by their job's vector.
+    Without usable word vectors it falls back to the whole (small) knowledge base and the most
+    recent jobs and applications.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kb = {} # role -> (header, sections, IVFIndex over sections)
+        self.queries = 0
+        self.fallbacks = 0
+
+    def _knowledge_base(self, role):
+        with self._lock:
+            if role not in self._kb:
+                header, sections = split_knowledge_base(KNOWLEDGE_BASE_HR if role == 'hr' else KNOWLEDGE_BASE_CANDIDATE)
+                index = IVFIndex()
+                for idx, features in enumerate(matching_service.featurize_batch(sections, with_lemmas=False)):
+                    index.add(idx, features.vector)
+                self._kb[role] = (header, sections, index)
+            return self._kb[role]
+
+    def _sync_jobs(self):
+        # Full pass once; afterwards score_store.job_changed / invalidate_job keep the index current
+        matching_service.ensure_job_index(lambda: Job.query.all())
+
+    def _retrieve_knowledge(self, role, vector):
+        header, sections, index = self._knowledge_base(role)
+        hits = index.search(vector, Config.CHAT_RETRIEVAL_TOP_K_KB) if vector is not None else []
+        # Keep the knowledge base's own order so related sections read naturally
+        chosen = sorted(idx for idx, _ in hits) if hits else range(len(sections))
+        return "\n".join([header] + [sections[idx] for idx in chosen])
+
+    def _retrieve_jobs(self, vector):
+        self._sync_jobs()
+        hits = matching_service.job_index.search(vector, Config.CHAT_RETRIEVAL_TOP_K_JOBS) if vector is not None else []
+        if hits:
+            jobs = {job.id: job for job in Job.query.filter(Job.id.in_([job_id for job_id, _ in hits])).all()}
+            jobs = [jobs[job_id] for job_id, _ in hits if job_id in jobs]
+        else:
+            jobs = Job.query.order_by(Job.created_at.desc()).limit(Config.CHAT_RETRIEVAL_TOP_K_JOBS).all()
+        if not jobs:
+            return None
+
+        rows = [(job.title, job.company, format_salary(job.salary, job.type), job.type, job.location,
+                 job.experience_level, job.tags) for job in jobs]
+        return build_table_context("Relevant Jobs", ('title', 'company', 'salary', 'type', 'location', 'level', 'skills'), rows)
+
+    def _retrieve_applications(self, user, vector):
+        query = db.session.query(
+            Application.job_id, Application.status, Application.applied_at, Application.match_score,
+            Job.title, Job.company, User.first_name, User.last_name
+        ).join(Job, Application.job_id == Job.id).join(User, Application.user_id == User.id)
+        if user.role == 'hr':
+            query = query.filter(Job.posted_by == user.id)
+        else:
+            query = query.filter(Application.user_id == user.id)
+        records = query.order_by(Application.applied_at.desc()).limit(Config.CHAT_CONTEXT_MAX_ROWS).all()
+        if not records:
+            return None
+
+        k = Config.CHAT_RETRIEVAL_TOP_K_APPLICATIONS
+        if vector is not None and len(records) > k:
+            # Similarity of each application's job to the question; most recent first on ties
+            query_vector = vector / np.linalg.norm(vector)
+            job_vectors = {job_id: matching_service.job_index.vector(job_id) for job_id in {r.job_id for r in records}}
+            similarity = [float(job_vectors[r.job_id] @ query_vector) if job_vectors[r.job_id] is not None else -1.0
+                          for r in records]
+            records = [records[i] for i in sorted(range(len(records)), key=lambda i: -similarity[i])]
+        records = records[:k]
+
+        applied = lambda r: r.applied_at.strftime("%Y-%m-%d") if r.applied_at else "N/A"
+        if user.role == 'hr':
+            rows = [(f"{r.first_name} {r.last_name}", r.title, r.status, r.match_score, applied(r)) for r in records]
+            return build_table_context("Relevant Applications", ('candidate', 'job_title', 'status', 'match_score', 'applied_date'), rows)
+        rows = [(r.title, r.company, r.status, applied(r)) for r in records]
+        return build_table_context("Relevant Applications", ('job_title', 'company', 'status', 'applied_date'), rows)
+
+    def retrieve(self, user, user_prompt):
+        """
+        Returns {'knowledge': text, 'context': text, 'reports': [...]} for one chat question.
+        """
+        self.queries += 1
+        features = matching_service.featurize_batch([user_prompt], with_lemmas=False)[0]
+        vector = features.vector if features.vector_norm else None
+        if vector is None:
+            self.fallbacks += 1
+
+        knowledge = self._retrieve_knowledge(user.role, vector) if user.role in ('hr', 'candidate') else ""
+        blocks, reports = [], []
+        for result in (self._retrieve_jobs(vector), self._retrieve_applications(user, vector)):
+            if result:
+                blocks.append(result[0])
+                reports.append(result[1])
+        return {'knowledge': knowledge, 'context': "\n\n".join(blocks), 'reports': reports}
+
+    def stats(self):
+        return {
+            'enabled': Config.CHAT_RETRIEVAL_ENABLED,
+            'queries': self.queries,
+            'fallbacks': self.fallbacks,
+            'knowledge_base_sections': {role: len(kb[1]) for role, kb in self._kb.items()},
+            'job_index': matching_service.job_index.stats()
+        }
+
+
+chat_retriever = ChatRetriever()
@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker over a rolling time window.
+    closed: calls pass; the breaker opens once the window holds at least min_calls
+            calls and the share of failed (or slower than slow_call_seconds) calls
+            reaches failure_rate.
+    open: calls are rejected immediately for open_seconds.
+    half_open: up to half_open_probes trial calls pass; one success closes the
+               breaker, a failure opens it again. A probe that reports nothing within
+               probe_timeout seconds (default slow_call_seconds) counts as a failure.
+    Results of calls that started before the breaker last opened are ignored.
+    """
+    def __init__(self, name, window_seconds=60, min_calls=5, failure_rate=0.5,
+                 slow_call_seconds=20, open_seconds=30, half_open_probes=1, probe_timeout=None):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.probe_timeout = probe_timeout if probe_timeout is not None else slow_call_seconds
+        self._lock = threading.Lock()
+        self._calls = deque() # (timestamp, ok, latency seconds)
+        self.state = 'closed'
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_at = 0.0 # When the last probe was let through
+        self.times_opened = 0
+        self.rejected = 0
+
+    def _prune(self, now):
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _open(self, now):
+        self.state = 'open'
+        self._opened_at = now
+        self._probes = 0
+        self.times_opened += 1
+        print(f"Circuit breaker for {self.name} opened.")
+
+    def allow(self):
+        """
+        Returns True if a call to the provider may be made now.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open' and now - self._opened_at >= self.open_seconds:
+                self.state = 'half_open'
+                self._probes = 0
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and self._probes >= self.half_open_probes \
+                    and now - self._probe_at >= self.probe_timeout:
+                print(f"Circuit breaker probe for {self.name} timed out.")
+                self._open(now)
+            if self.state == 'half_open' and self._probes < self.half_open_probes:
+                self._probes += 1
+                self._probe_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def release(self):
+        """
+        Gives back a half-open probe slot taken by allow() for a call that was never
+        made or was abandoned before it could tell whether the provider is healthy.
+        """
+        with self._lock:
+            if self.state == 'half_open' and self._probes > 0:
+                self._probes -= 1
+
+    def record(self, ok, latency, started_at=None):
+        """
+        Records one call's outcome. started_at (time.monotonic() when the call began)
+        lets results of calls made before the breaker opened be ignored.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if started_at is not None and self.state != 'closed' and started_at < self._opened_at:
+                return # Stale: says nothing about the provider since it was opened
+            if self.state == 'half_open':
+                if ok:
+                    self.state = 'closed'
+                    self._calls.clear()
+                    print(f"Circuit breaker for {self.name} closed.")
+                else:
+                    self._open(now)
+                return
+
+            self._calls.append((now, ok, latency))
+            self._prune(now)
+            if self.state == 'closed' and len(self._calls) >= self.min_calls:
+                failed = sum(1 for _, call_ok, call_latency in self._calls
+                             if not call_ok or call_latency > self.slow_call_seconds)
+                if failed / len(self._calls) >= self.failure_rate:
+                    self._open(now)
+
+    def record_success(self, latency, started_at=None):
+        self.record(True, latency, started_at)
+
+    def record_failure(self, latency, started_at=None):
+        self.record(False, latency, started_at)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            calls = list(self._calls)
+        latencies = sorted(latency for _, _, latency in calls)
+        errors = sum(1 for _, ok, _ in calls if not ok)
+        slow = sum(1 for latency in latencies if latency > self.slow_call_seconds)
+        return {
+            'state': self.state,
+            'window_calls': len(calls),
+            'error_rate': round(errors / len(calls), 3) if calls else 0.0,
+            'slow_rate': round(slow / len(calls), 3) if calls else 0.0,
+            'p50_latency': round(latencies[len(latencies) // 2], 3) if latencies else None,
+            'p95_latency': round(latencies[int(len(latencies) * 0.95)], 3) if latencies else None,
+            'times_opened': self.times_opened,
+            'rejected': self.rejected
+        }
@@ -0,0 +1,124 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..database import db
+from ..config import Config
+from ..models import Application, Job
+from .matching_service import matching_service
+from .scoring_pool import in_main_process
+
+
+class ExplanationStore:
+    """
+    Fills in the missing match explanations of a job's applications in the background.
+    Runs take minutes of LLM calls, so they get their own EXPLANATION_JOB_WORKERS threads
+    instead of the shared task queue, which would hold up rescoring and resume ingestion.
+    Work is done in chunks of EXPLANATION_CONCURRENCY * EXPLANATION_BATCH_SIZE applications,
+    each committed as soon as it is done, so progress is visible (and kept) during a long run.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs = {} # job_id -> {'status': queued|running|done|failed, 'generated', 'failed', 'error'}
+        self._app = None
+        self._pool = None
+
+    def init_app(self, app):
+        self._app = app
+
+    def _submit(self, job_id):
+        # Without an app (e.g. CLI scripts) there are no workers: run inline
+        if self._app is None or not in_main_process():
+            self.explain_job(job_id)
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=Config.EXPLANATION_JOB_WORKERS,
+                                                thread_name_prefix='explanations')
+        self._pool.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        with self._app.app_context():
+            try:
+                self.explain_job(job_id)
+            except Exception as e:
+                print(f"Explanation run for job {job_id} failed: {e}")
+                with self._lock:
+                    if job_id in self._runs:
+                        self._runs[job_id].update(status='failed', error=str(e))
+
+    def _pending(self, job_id):
+        applications = Application.query.filter_by(job_id=job_id).all()
+        return applications, [app for app in applications if not app.match_explanation and app.user.profile]
+
+    def schedule(self, job):
+        """
+        Enqueues explanation of the job's unexplained applications (unless already queued
+        or running) and returns the job's progress.
+        """
+        _, pending = self._pending(job.id)
+        with self._lock:
+            run = self._runs.get(job.id)
+            if pending and (run is None or run['status'] in ('done', 'failed')):
+                self._runs[job.id] = {'status': 'queued', 'generated': 0, 'failed': 0, 'error': None}
+                schedule = True
+            else:
+                schedule = False
+        if schedule:
+            self._submit(job.id)
+        return self.progress(job)
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            self._runs[job_id].update(changes)
+
+    def explain_job(self, job_id):
+        """
+        Background step: explains the pending applications chunk by chunk.
+        """
+        job = Job.query.get(job_id)
+        if job is None:
+            with self._lock:
+                self._runs.pop(job_id, None)
+            return
+
+        self._update(job_id, status='running')
+        _, pending = self._pending(job_id)
+        chunk_size = max(1, Config.EXPLANATION_CONCURRENCY * Config.EXPLANATION_BATCH_SIZE)
+        generated = failed = 0
+        try:
+            for start in range(0, len(pending), chunk_size):
+                chunk = pending[start:start + chunk_size]
+                # Several candidates per LLM call, a few calls at a time
+                explanations = matching_service.generate_explanations(
+                    job, [(app.id, app.user.profile, app.match_score) for app in chunk]
+                )
+                for app in chunk:
+                    if app.id in explanations:
+                        app.match_explanation = explanations[app.id]
+                db.session.commit()
+                generated += len(explanations)
+                failed += len(chunk) - len(explanations)
+                self._update(job_id, generated=generated, failed=failed)
+            self._update(job_id, status='done')
+            print(f"Generated {generated} match explanations for job {job_id} ({failed} failed).")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error generating explanations for job {job_id}: {e}")
+            self._update(job_id, status='failed', error=str(e))
+
+    def progress(self, job):
+        applications, pending = self._pending(job.id)
+        with self._lock:
+            run = dict(self._runs.get(job.id) or {'status': 'idle', 'generated': 0, 'failed': 0, 'error': None})
+        return {
+            'job_id': job.id,
+            'status': run['status'],
+            'total_applications': len(applications),
+            'explained': sum(1 for app in applications if app.match_explanation),
+            'pending': len(pending),
+            'generated': run['generated'],
+            'failed': run['failed'],
+            'error': run['error']
+        }
+
+
+explanation_store = ExplanationStore()
@@ -0,0 +1,66 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+def content_hash(*parts):
+    """
+    Stable hash of the text fields a cached feature was computed from.
+    None and empty strings hash the same, matching how the scorer treats them.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update((part or "").encode('utf-8', errors='ignore'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    Thread-safe LRU cache for spaCy-derived features.
+    Every entry remembers the content hash it was built from, so an entry is only
+    returned if the underlying text has not changed since it was cached.
+    """
+    def __init__(self, max_size=2048):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, expected_hash):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != expected_hash:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, entry_hash, value):
+        with self._lock:
+            self._entries[key] = (entry_hash, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,170 @@
+import threading
+import time
+from collections import deque
+from ..models import Job
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton: finds every occurrence of many patterns in one pass over the text.
+    Each pattern carries one or more payloads, which are what a search returns.
+    Patterns can be added and removed at any time; the trie is updated in place and the
+    failure links are recomputed lazily on the next search.
+    """
+    def __init__(self):
+        self._goto = [{}] # node -> {char: node}
+        self._out = [set()] # node -> payloads of the patterns ending at this node
+        self._fail = [0]
+        self._dict_link = [0] # node -> nearest node on its failure chain with payloads (0 = none)
+        self._dirty = False
+
+    def _node(self, pattern, create=False):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                if not create:
+                    return None
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._out.append(set())
+                self._fail.append(0)
+                self._dict_link.append(0)
+            node = nxt
+        return node
+
+    def add(self, pattern, payload):
+        if pattern:
+            self._out[self._node(pattern, create=True)].add(payload)
+            self._dirty = True
+
+    def remove(self, pattern, payload):
+        # Trie nodes are kept; a node without payloads simply matches nothing
+        node = self._node(pattern) if pattern else None
+        if node is not None and payload in self._out[node]:
+            self._out[node].discard(payload)
+            self._dirty = True
+
+    def _build_links(self):
+        queue = deque()
+        for node in self._goto[0].values():
+            self._fail[node] = 0
+            self._dict_link[node] = 0
+            queue.append(node)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[child] = fail if fail != child else 0
+                self._dict_link[child] = fail if self._out[fail] else self._dict_link[fail]
+                queue.append(child)
+        self._dirty = False
+
+    def search(self, text):
+        """
+        Returns (payload, end position) for every pattern occurrence in text.
+        """
+        if self._dirty:
+            self._build_links()
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        matches = []
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if out[node] else dict_link[node]
+            while hit:
+                matches.extend((payload, pos) for payload in out[hit])
+                hit = dict_link[hit]
+        return matches
+
+
+class IntentMatcher:
+    """
+    Detects the intents of a chat message (keyword groups) and the longest job title it
+    mentions, in a single pass over the lower-cased message.
+    Job titles are loaded once and then kept current by job_saved / job_removed; every
+    resync_seconds the titles are reloaded anyway, to pick up changes made by other processes.
+    """
+    def __init__(self, keyword_groups, resync_seconds=300):
+        self.resync_seconds = resync_seconds
+        self._lock = threading.Lock()
+        self._keyword_groups = keyword_groups
+        self._job_titles = {} # job id -> lower-cased title
+        self._title_jobs = {} # lower-cased title -> set of job ids
+        self._automaton = None
+        self._last_full_sync = 0.0
+        self.searches = 0
+
+    def _rebuild(self):
+        automaton = AhoCorasick()
+        for group, keywords in self._keyword_groups.items():
+            for keyword in keywords:
+                automaton.add(keyword.lower(), ('keyword', group))
+        self._job_titles = {job_id: (title or "").lower() for job_id, title in Job.query.with_entities(Job.id, Job.title).all()}
+        self._title_jobs = {}
+        for job_id, title in self._job_titles.items():
+            self._title_jobs.setdefault(title, set()).add(job_id)
+            automaton.add(title, ('title', title))
+        self._automaton = automaton
+        self._last_full_sync = time.monotonic()
+
+    def _ensure_built(self):
+        if self._automaton is None or time.monotonic() - self._last_full_sync >= self.resync_seconds:
+            self._rebuild()
+
+    def _drop_title(self, job_id):
+        title = self._job_titles.pop(job_id, None)
+        if title is None:
+            return
+        ids = self._title_jobs.get(title, set())
+        ids.discard(job_id)
+        if not ids:
+            self._title_jobs.pop(title, None)
+            self._automaton.remove(title, ('title', title))
+
+    def job_saved(self, job):
+        """Call after a job is created or edited."""
+        with self._lock:
+            if self._automaton is None:
+                return # Built from the database on first use
+            self._drop_title(job.id)
+            title = (job.title or "").lower()
+            self._job_titles[job.id] = title
+            self._title_jobs.setdefault(title, set()).add(job.id)
+            self._automaton.add(title, ('title', title))
+
+    def job_removed(self, job_id):
+        """Call after a job is deleted."""
+        with self._lock:
+            if self._automaton is not None:
+                self._drop_title(job_id)
+
+    def match(self, prompt_lower):
+        """
+        Returns (set of matched keyword groups, id of a job with the longest mentioned title or None).
+        """
+        with self._lock:
+            self._ensure_built()
+            self.searches += 1
+            groups, best_title = set(), None
+            for (kind, value), _ in self._automaton.search(prompt_lower):
+                if kind == 'keyword':
+                    groups.add(value)
+                elif best_title is None or len(value) > len(best_title):
+                    best_title = value
+            job_id = min(self._title_jobs[best_title]) if best_title else None
+        return groups, job_id
+
+    def stats(self):
+        return {
+            'job_titles': len(self._title_jobs),
+            'keyword_groups': len(self._keyword_groups),
+            'searches': self.searches,
+            'resync_seconds': self.resync_seconds
+        }
@@ -1,8 +1,32 @@
 import os
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 import google.generativeai as genai
 from openai import OpenAI
+from ..config import Config
+from .llm_cache import LLMResponseCache, prompt_key
+from .circuit_breaker import CircuitBreaker
+
+PROVIDER_LABELS = {'gemini': 'Gemini', 'groq': 'Groq (Llama 3)'}
+
+def is_json(text):
+    """validate= check for prompts that ask for JSON (a markdown code fence around it is allowed)."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.replace("```json", "").replace("```", "")
+    try:
+        json.loads(text)
+        return True
+    except ValueError:
+        return False
 
 class LLMService:
+    GEMINI_MODEL = 'gemini-2.5-flash'
+    GROQ_MODEL = 'llama-3.3-70b-versatile'
+
     def __init__(self):
         # 1. Configure Gemini (Primary)
         self.gemini_key = os.getenv("GEMINI_API_KEY")
@@ -10,7 +34,7 @@ class LLMService:
         if self.gemini_key:
             try:
                 genai.configure(api_key=self.gemini_key)
-                self.gemini_model = genai.GenerativeModel('gemini-2.5-flash')
+                self.gemini_model = genai.GenerativeModel(self.GEMINI_MODEL)
             except Exception as e:
                 print(f"Gemini Init Error: {e}")
 
@@ -27,40 +51,350 @@ class LLMService:
             except Exception as e:
                 print(f"Groq Init Error: {e}")
 
-    def generate_text(self, system_prompt, user_prompt):
+        # 3. One circuit breaker per provider, so a degraded provider is skipped quickly
+        self.breakers = {
+            provider: CircuitBreaker(
+                PROVIDER_LABELS[provider],
+                window_seconds=Config.LLM_BREAKER_WINDOW,
+                min_calls=Config.LLM_BREAKER_MIN_CALLS,
+                failure_rate=Config.LLM_BREAKER_FAILURE_RATE,
+                slow_call_seconds=Config.LLM_BREAKER_SLOW_CALL_SECONDS,
+                open_seconds=Config.LLM_BREAKER_OPEN_SECONDS
+            ) for provider in PROVIDER_LABELS
+        }
+
+        # 4. Hedging: on selected endpoints, ask the fallback provider too if the primary is slow
+        self.hedge_endpoints = set(Config.LLM_HEDGE_ENDPOINTS)
+        self._latencies = {provider: deque(maxlen=200) for provider in PROVIDER_LABELS}
+        self._hedge_lock = threading.Lock()
+        self.hedge_requests = 0
+        self.hedges_fired = 0
+        self.hedge_wins = {provider: 0 for provider in PROVIDER_LABELS}
+
+        # 5. Single-flight: concurrent identical requests share one upstream call
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.single_flight_calls = 0
+        self.coalesced = 0
+
+        # 6. Response cache (identical prompts are answered from disk)
+        self.cache = None
+        if Config.LLM_CACHE_ENABLED:
+            self.cache = LLMResponseCache(Config.LLM_CACHE_PATH, ttl=Config.LLM_CACHE_TTL,
+                                          max_entries=Config.LLM_CACHE_MAX_ENTRIES)
+
+    def _cached(self, provider, model, system_prompt, user_prompt, use_cache, validate=None):
+        if not use_cache or self.cache is None:
+            return None, None
+        key = prompt_key(provider, model, system_prompt, user_prompt)
+        cached = self.cache.get(key)
+        # Entries stored before the caller validated its answers are treated as misses
+        if cached is not None and validate is not None and not validate(cached):
+            cached = None
+        return key, cached
+
+    def _store(self, key, response, validate=None):
+        # Empty or invalid answers are usually failures, so they are not kept;
+        # otherwise a malformed answer would be replayed until the entry expires
+        if key is not None and response and (validate is None or validate(response)):
+            self.cache.set(key, response)
+
+    def _single_flight(self, key, fn):
         """
-        Generates text using Gemini (Primary) or Groq (Fallback).
+        Runs fn() once per key at a time: callers arriving while a call with the same key
+        is in flight wait for it and receive the same result (or exception).
+        """
+        with self._inflight_lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self.single_flight_calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight['done'].wait()
+            if flight['error'] is not None:
+                raise flight['error']
+            return flight['result']
+
+        try:
+            flight['result'] = fn()
+            return flight['result']
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            flight['done'].set()
+
+    def _call_gemini(self, system_prompt, user_prompt):
+        combined_prompt = f"{system_prompt}\n\nUser Request: {user_prompt}"
+        response = self.gemini_model.generate_content(combined_prompt)
+        return response.text
+
+    def _call_groq(self, system_prompt, user_prompt):
+        # Use Llama 3 8B (Fast & Free Tier friendly)
+        response = self.groq_client.chat.completions.create(
+            model=self.GROQ_MODEL, 
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.4
+        )
+        return response.choices[0].message.content
+
+    def _stream_gemini(self, system_prompt, user_prompt):
+        combined_prompt = f"{system_prompt}\n\nUser Request: {user_prompt}"
+        for chunk in self.gemini_model.generate_content(combined_prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+    def _stream_groq(self, system_prompt, user_prompt):
+        stream = self.groq_client.chat.completions.create(
+            model=self.GROQ_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            temperature=0.4,
+            stream=True
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+    def _providers(self):
         """
-        # --- Attempt 1: Gemini ---
+        Configured providers in priority order: Gemini (Primary), then Groq (Fallback).
+        """
+        providers = []
         if self.gemini_model:
+            providers.append(('gemini', self.GEMINI_MODEL, self._call_gemini, self._stream_gemini))
+        if self.groq_client:
+            providers.append(('groq', self.GROQ_MODEL, self._call_groq, self._stream_groq))
+        return providers
+
+    def _skip_open_circuit(self, provider):
+        if self.breakers[provider].allow():
+            return False
+        print(f"{PROVIDER_LABELS[provider]} circuit breaker is open, skipping.")
+        return True
+
+    def _timed_call(self, provider, call, system_prompt, user_prompt):
+        """
+        Calls one provider, recording the outcome on its circuit breaker and latency history.
+        """
+        start = time.monotonic()
+        try:
+            text = call(system_prompt, user_prompt)
+        except Exception as e:
+            self.breakers[provider].record_failure(time.monotonic() - start, started_at=start)
+            print(f"{PROVIDER_LABELS[provider]} API Failed: {e}")
+            raise
+        latency = time.monotonic() - start
+        self.breakers[provider].record_success(latency, started_at=start)
+        self._latencies[provider].append(latency)
+        return text
+
+    def hedge_delay(self, provider):
+        """
+        How long to wait for the provider before hedging: the configured percentile of its
+        recent successful latencies, clamped to [LLM_HEDGE_MIN_DELAY, LLM_HEDGE_MAX_DELAY].
+        Until enough calls have been seen the maximum is used.
+        """
+        latencies = sorted(self._latencies[provider])
+        if len(latencies) < Config.LLM_HEDGE_MIN_SAMPLES:
+            return Config.LLM_HEDGE_MAX_DELAY
+        delay = latencies[min(int(len(latencies) * Config.LLM_HEDGE_PERCENTILE), len(latencies) - 1)]
+        return min(max(delay, Config.LLM_HEDGE_MIN_DELAY), Config.LLM_HEDGE_MAX_DELAY)
+
+    def _start_call(self, provider, call, system_prompt, user_prompt):
+        """
+        Runs _timed_call on a thread of its own and returns its Future. Each hedged request
+        gets its own threads, so slow or abandoned calls never hold up other requests.
+        """
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
             try:
-                combined_prompt = f"{system_prompt}\n\nUser Request: {user_prompt}"
-                response = self.gemini_model.generate_content(combined_prompt)
-                return response.text
+                future.set_result(self._timed_call(provider, call, system_prompt, user_prompt))
             except Exception as e:
-                print(f"Gemini API Failed: {e}")
-                # If Groq is not configured, we must fail here
-                if not self.groq_client:
-                    raise e
-        
-        # --- Attempt 2: Groq (Fallback) ---
-        if self.groq_client:
-            print("Switching to Groq (Llama 3)...")
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f'llm-{provider}', daemon=True).start()
+        return future
+
+    def _generate_hedged(self, providers, system_prompt, user_prompt, keys, validate):
+        """
+        Sends the prompt to the primary provider; if it has not answered within hedge_delay,
+        sends it to the secondary as well and returns whichever succeeds first.
+        The losing call cannot be interrupted mid-request; it is left to finish in the
+        background (still recording its outcome on its breaker) and its answer discarded.
+        """
+        (primary, _, primary_call, _), (secondary, _, secondary_call, _) = providers[:2]
+        with self._hedge_lock:
+            self.hedge_requests += 1
+        futures = {self._start_call(primary, primary_call, system_prompt, user_prompt): primary}
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+
+        hedged = False
+        if not done or next(iter(done)).exception() is not None:
+            if not self._skip_open_circuit(secondary):
+                futures[self._start_call(secondary, secondary_call, system_prompt, user_prompt)] = secondary
+                if not done:
+                    print(f"{PROVIDER_LABELS[primary]} is slow, hedging with {PROVIDER_LABELS[secondary]}...")
+                    hedged = True
+                    with self._hedge_lock:
+                        self.hedges_fired += 1
+
+        last_error = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    last_error = future.exception()
+                    continue
+                winner = futures[future]
+                if hedged:
+                    # Only races that actually took place count as wins
+                    with self._hedge_lock:
+                        self.hedge_wins[winner] += 1
+                text = future.result()
+                self._store(keys.get(winner), text, validate)
+                return text
+        raise last_error # Both providers failed
+
+    def generate_text(self, system_prompt, user_prompt, use_cache=True, endpoint=None, validate=None):
+        """
+        Generates text using Gemini (Primary) or Groq (Fallback).
+        Responses are cached per provider and model; pass use_cache=False where every
+        call must produce fresh output. Providers whose circuit breaker is open are
+        skipped without waiting for them to fail.
+        If endpoint is listed in LLM_HEDGE_ENDPOINTS, a slow primary is hedged with the
+        fallback provider (see _generate_hedged).
+        Cacheable requests are also coalesced: identical prompts already in flight are
+        not sent again, the callers share the first call's answer.
+        validate(text) -> bool decides whether an answer may be cached (e.g. is_json);
+        answers it rejects are still returned, so the caller can handle them as before.
+        """
+        if not use_cache:
+            return self._generate_text(system_prompt, user_prompt, use_cache, endpoint, validate)
+        key = prompt_key('', '', system_prompt, user_prompt)
+        return self._single_flight(key, lambda: self._generate_text(system_prompt, user_prompt, use_cache, endpoint, validate))
+
+    def _generate_text(self, system_prompt, user_prompt, use_cache, endpoint, validate):
+        providers = self._providers()
+        if endpoint in self.hedge_endpoints and len(providers) > 1:
+            keys = {}
+            for provider, model, _, _ in providers:
+                keys[provider], cached = self._cached(provider, model, system_prompt, user_prompt, use_cache, validate)
+                if cached is not None:
+                    return cached
+            if not self._skip_open_circuit(providers[0][0]):
+                return self._generate_hedged(providers, system_prompt, user_prompt, keys, validate)
+            providers = providers[1:] # Primary circuit is open; plain fallback
+
+        last_error = None
+        for idx, (provider, model, call, _) in enumerate(providers):
+            key, cached = self._cached(provider, model, system_prompt, user_prompt, use_cache, validate)
+            if cached is not None:
+                return cached
+            if self._skip_open_circuit(provider):
+                last_error = Exception(f"{PROVIDER_LABELS[provider]} is unavailable (circuit open).")
+                continue
+
+            if idx > 0:
+                print(f"Switching to {PROVIDER_LABELS[provider]}...")
             try:
-                # Use Llama 3 8B (Fast & Free Tier friendly)
-                response = self.groq_client.chat.completions.create(
-                    model="llama-3.3-70b-versatile", 
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    temperature=0.4
-                )
-                return response.choices[0].message.content
+                text = self._timed_call(provider, call, system_prompt, user_prompt)
+            except Exception as e:
+                last_error = e
+                continue
+            self._store(key, text, validate)
+            return text
+
+        if last_error:
+            raise last_error # All providers failed
+        raise Exception("No LLM provider configured or available.")
+
+    def generate_stream(self, system_prompt, user_prompt, use_cache=True, validate=None):
+        """
+        Like generate_text, but yields the response in chunks as the provider produces them.
+        Falls back to the next provider only if one fails before sending anything; a
+        failure mid-stream is raised, since the caller has already forwarded partial output.
+        Breaker latency is the time to the first chunk.
+        """
+        last_error = None
+        for idx, (provider, model, _, stream) in enumerate(self._providers()):
+            key, cached = self._cached(provider, model, system_prompt, user_prompt, use_cache, validate)
+            if cached is not None:
+                yield cached
+                return
+            if self._skip_open_circuit(provider):
+                last_error = Exception(f"{PROVIDER_LABELS[provider]} is unavailable (circuit open).")
+                continue
+
+            if idx > 0:
+                print(f"Switching to {PROVIDER_LABELS[provider]}...")
+            start = time.monotonic()
+            first_chunk_latency = None
+            chunks = []
+            try:
+                for chunk in stream(system_prompt, user_prompt):
+                    if first_chunk_latency is None:
+                        first_chunk_latency = time.monotonic() - start
+                    chunks.append(chunk)
+                    yield chunk
+            except GeneratorExit:
+                # Client went away mid-stream: the provider was healthy if it had sent anything,
+                # otherwise there is no verdict and a half-open probe slot is given back
+                if first_chunk_latency is None:
+                    self.breakers[provider].release()
+                else:
+                    self.breakers[provider].record_success(first_chunk_latency, started_at=start)
+                raise
             except Exception as e:
-                print(f"Groq API Failed: {e}")
-                raise e # Both providers failed
-        
+                self.breakers[provider].record_failure(time.monotonic() - start, started_at=start)
+                print(f"{PROVIDER_LABELS[provider]} API Failed: {e}")
+                if chunks:
+                    raise e # Partial output already sent
+                last_error = e
+                continue
+            # Not added to the hedge latency history: hedge_delay is about full completions,
+            # and time to the first chunk would make hedges fire far too early
+            self.breakers[provider].record_success(first_chunk_latency or time.monotonic() - start, started_at=start)
+            self._store(key, "".join(chunks), validate)
+            return
+
+        if last_error:
+            raise last_error # All providers failed
         raise Exception("No LLM provider configured or available.")
 
+    def stats(self):
+        return {
+            'gemini': self.gemini_model is not None,
+            'groq': self.groq_client is not None,
+            'cache': self.cache.stats() if self.cache is not None else None,
+            'circuit_breakers': {provider: breaker.stats() for provider, breaker in self.breakers.items()},
+            'hedging': {
+                'endpoints': sorted(self.hedge_endpoints),
+                'delay_seconds': round(self.hedge_delay('gemini'), 3),
+                'requests': self.hedge_requests,
+                'hedges_fired': self.hedges_fired,
+                'wins': dict(self.hedge_wins)
+            },
+            'single_flight': {
+                'in_flight': len(self._inflight),
+                'calls': self.single_flight_calls,
+                'coalesced': self.coalesced
+            }
+        }
+
 llm_service = LLMService()
\ No newline at end of file
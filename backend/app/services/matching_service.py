@@ -1,18 +1,113 @@
 import spacy
+import numpy as np
 import json
 import re
-from .llm_service import llm_service
+import heapq
+import math
+import threading
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from ..config import Config
+from .llm_service import llm_service, is_json
+from .feature_cache import FeatureCache, content_hash
+from .scoring_pool import ScoringExecutor, in_main_process
+from .vector_index import IVFIndex
+from .text_utils import estimate_tokens
+from .task_queue import task_queue
+
+# Pre-computed spaCy output for one side of a match (job or profile)
+TextFeatures = namedtuple('TextFeatures', ['lemmas', 'vector', 'vector_norm'])
+
+# Pipeline components that never influence lemmas or vectors
+SCORER_UNUSED_PIPES = ('parser', 'ner', 'senter')
 
 class MatchingService:
+    # Bump whenever the scoring formula changes so persisted scores are recomputed
+    SCORER_VERSION = "1"
+    # Bump whenever the resume parser prompt changes so cached parses are redone
+    RESUME_PARSER_VERSION = "1"
+
     def __init__(self):
-        try:
-            print("Loading spaCy model...")
-            # Ensure you have run: python -m spacy download en_core_web_md
-            self.nlp = spacy.load("en_core_web_md")
-            print("spaCy model loaded successfully.")
-        except OSError:
-            print("WARNING: 'en_core_web_md' model not found. Using blank model.")
-            self.nlp = spacy.blank("en")
+        # Per-job features (core lemmas + document vector), keyed by job id
+        self.job_cache = FeatureCache(max_size=Config.JOB_FEATURE_CACHE_SIZE)
+        # Per-profile features (lemmas + vector), keyed by profile id or parsed-resume hash
+        self.profile_cache = FeatureCache(max_size=Config.PROFILE_FEATURE_CACHE_SIZE)
+
+        # Approximate nearest-neighbour index over job document vectors: filled by one full
+        # sync on first use, then kept current by index_job / invalidate_job
+        self.job_index = IVFIndex(n_probe=Config.ANN_N_PROBE, train_threshold=Config.ANN_TRAIN_THRESHOLD)
+        self._job_index_lock = threading.Lock()
+        self._job_index_synced = False
+
+        # The spaCy model is loaded lazily (or by warm_up) so importing the app stays fast
+        self._nlp = None
+        self._nlp_lock = threading.Lock()
+        self._created_at = time.perf_counter()
+        self.model_name = None
+        self.load_seconds = None
+        self.time_to_ready = None
+
+        # Optional process pool for bulk featurization (never created inside a worker itself)
+        self.executor = None
+        if Config.SCORING_WORKERS > 0 and in_main_process():
+            self.executor = ScoringExecutor(
+                max_workers=Config.SCORING_WORKERS,
+                batch_size=Config.SPACY_BATCH_SIZE,
+                max_queue=Config.SCORING_MAX_QUEUE,
+                timeout=Config.SCORING_TIMEOUT,
+                start_method=Config.SCORING_START_METHOD
+            )
+
+    @property
+    def nlp(self):
+        if self._nlp is None:
+            self._load_model()
+        return self._nlp
+
+    def _load_model(self):
+        with self._nlp_lock:
+            if self._nlp is not None:
+                return
+            started = time.perf_counter()
+            try:
+                print(f"Loading spaCy model '{Config.SPACY_MODEL}' (excluding: {', '.join(Config.SPACY_EXCLUDE) or 'none'})...")
+                # Ensure you have run: python -m spacy download en_core_web_md
+                nlp = spacy.load(Config.SPACY_MODEL, exclude=Config.SPACY_EXCLUDE)
+                self.model_name = Config.SPACY_MODEL
+            except OSError:
+                print(f"WARNING: '{Config.SPACY_MODEL}' model not found. Using blank model.")
+                nlp = spacy.blank("en")
+                self.model_name = "blank:en"
+
+            finished = time.perf_counter()
+            self.load_seconds = round(finished - started, 3)
+            self.time_to_ready = round(finished - self._created_at, 3)
+            self._nlp = nlp
+            print(f"spaCy model ready (load: {self.load_seconds}s, time-to-ready: {self.time_to_ready}s).")
+
+    def warm_up(self):
+        """
+        Loads the spaCy model in a background thread so startup is not blocked.
+        """
+        if self._nlp is None:
+            threading.Thread(target=self._load_model, name='spacy-warm-up', daemon=True).start()
+        if self.executor is not None:
+            self.executor.warm_up()
+
+    def status(self):
+        return {
+            'ready': self._nlp is not None,
+            'model': self.model_name or Config.SPACY_MODEL,
+            'excluded_components': Config.SPACY_EXCLUDE,
+            'load_seconds': self.load_seconds,
+            'time_to_ready_seconds': self.time_to_ready,
+            'job_cache': self.job_cache.stats(),
+            'profile_cache': self.profile_cache.stats(),
+            'job_index': self.job_index.stats(),
+            'scoring_pool': self.executor.stats() if self.executor else None
+        }
 
     def _clean_text(self, text):
         if not text:
@@ -21,11 +116,10 @@ class MatchingService:
         text = re.sub(r'[^a-zA-Z0-9\s\+\#\.\-]', ' ', text)
         return text.lower().strip()
 
-    def _get_lemmas(self, text):
+    def _lemmas_from_doc(self, doc):
         """
         Extracts base forms of words (lemmas) to match 'Analyzing' with 'Analysis'.
         """
-        doc = self.nlp(self._clean_text(text))
         # Filter out stop words, punctuation, and short junk
         return set([token.lemma_ for token in doc if not token.is_stop and not token.is_punct and len(token.text) > 2])
 
@@ -111,82 +205,430 @@ class MatchingService:
 
         return ". ".join(text_parts)
 
-    def calculate_score(self, profile, job):
-        try:
-            if not self.nlp or not self.nlp.vocab:
-                return 0.0
+    def _construct_job_core_text(self, job):
+        """
+        Constructs the "Must Have" keyword text from Job Title and Tags only.
+        """
+        job_core_text = f"{job.title} {job.title}" # Double weight on title
+        if job.tags:
+            job_core_text += f" {job.tags.replace(',', ' ')}"
+        return job_core_text
 
-            # --- CORE KEYWORD MATCH (The "Hard" Skills) ---
-            # We derive the "Must Haves" strictly from Job Title and Tags.
-            # We ignore the description body for this part to avoid noise.
+    def _disabled_pipes(self):
+        # The scorer only needs lemmas (tagger -> attribute_ruler -> lemmatizer) and vectors
+        return [name for name in SCORER_UNUSED_PIPES if name in self.nlp.pipe_names]
 
-            job_core_text = f"{job.title} {job.title}" # Double weight on title
-            if job.tags:
-                job_core_text += f" {job.tags.replace(',', ' ')}"
+    def featurize_batch(self, texts, with_lemmas=True):
+        """
+        Featurizes many texts, running only the pipeline components the scorer needs.
+        Returns a list of TextFeatures in the same order as `texts`.
+        With with_lemmas=False only the tokenizer runs, since document vectors are
+        averaged static word vectors and need no other pipeline component.
+        Uses the scoring worker pool when enabled, otherwise nlp.pipe in-process.
+        """
+        if not texts:
+            return []
+
+        if self.executor is not None:
+            features = self.executor.featurize(texts, with_lemmas)
+            if features is not None:
+                return features
+
+        return self._featurize_local(texts, with_lemmas)
+
+    def _featurize_local(self, texts, with_lemmas=True):
+
+        batch_size = Config.SPACY_BATCH_SIZE
+        # Spawning worker processes only pays off for at least one full batch
+        n_process = Config.SPACY_N_PROCESS if len(texts) > batch_size else 1
+        if with_lemmas:
+            docs = self.nlp.pipe([self._clean_text(text) for text in texts], batch_size=batch_size,
+                                 n_process=n_process, disable=self._disabled_pipes())
+        else:
+            docs = self.nlp.tokenizer.pipe([self._clean_text(text[:100000]) for text in texts],
+                                           batch_size=batch_size)
+
+        features = []
+        for text, doc in zip(texts, docs):
+            lemmas = frozenset(self._lemmas_from_doc(doc)) if with_lemmas else frozenset()
+            # Vectors are computed on at most the first 100k characters
+            if with_lemmas and len(text) > 100000:
+                doc = self.nlp.make_doc(self._clean_text(text[:100000]))
+            features.append(TextFeatures(lemmas, doc.vector, doc.vector_norm))
+        return features
+
+    @property
+    def scorer_version(self):
+        # Scores also depend on the word vectors, so the configured model is part of the version.
+        # Read without loading the model; only a known fallback to the blank model changes it
+        version = f"{self.SCORER_VERSION}/{Config.SPACY_MODEL}"
+        return version + "+blank" if self.model_name == "blank:en" else version
+
+    def job_hash(self, job):
+        return content_hash(job.title, job.tags, job.description)
+
+    def profile_hash(self, profile):
+        return content_hash(self._construct_profile_text(profile))
+
+    def _job_features_many(self, jobs, with_vectors=True):
+        """
+        Returns cached features for each job, featurizing all cache misses in one batch.
+        Jobs are only re-parsed if their text changed.
+        With with_vectors=False only the cheap core lemmas are guaranteed; the description
+        vector (the expensive part) is filled in later if a caller needs it.
+        """
+        features = [None] * len(jobs)
+        job_hashes = [self.job_hash(job) for job in jobs]
+        need_lemmas = []
+        need_vectors = []
+        for idx, job in enumerate(jobs):
+            cached = self.job_cache.get(job.id, job_hashes[idx]) if job.id is not None else None
+            features[idx] = cached
+            if cached is None:
+                need_lemmas.append(idx)
+            if with_vectors and (cached is None or cached.vector is None):
+                need_vectors.append(idx)
+
+        core_features = dict(zip(need_lemmas, self.featurize_batch(
+            [self._construct_job_core_text(jobs[idx]) for idx in need_lemmas]
+        )))
+        vector_features = dict(zip(need_vectors, self.featurize_batch(
+            [self._construct_job_text_for_vector(jobs[idx]) for idx in need_vectors], with_lemmas=False
+        )))
+
+        for idx in set(need_lemmas) | set(need_vectors):
+            job = jobs[idx]
+            lemmas = core_features[idx].lemmas if idx in core_features else features[idx].lemmas
+            if idx in vector_features:
+                vec = vector_features[idx]
+                features[idx] = TextFeatures(lemmas, vec.vector, vec.vector_norm)
+            else:
+                features[idx] = TextFeatures(lemmas, None, None)
+            if job.id is not None:
+                self.job_cache.set(job.id, job_hashes[idx], features[idx])
+        return features
 
-            job_core_lemmas = self._get_lemmas(job_core_text)
+    def _job_features(self, job):
+        return self._job_features_many([job])[0]
 
-            # Profile "Searchable" text
-            profile_search_text = self._construct_profile_text(profile)
-            profile_lemmas = self._get_lemmas(profile_search_text)
+    def _profile_cache_key(self, profile, text_hash):
+        # DB profiles are keyed by id so edits can evict them; parsed resumes by content
+        if isinstance(profile, dict) or getattr(profile, 'id', None) is None:
+            return ('parsed', text_hash)
+        return ('profile', profile.id)
 
-            # Calculate Overlap
-            if not job_core_lemmas:
-                keyword_score = 0.0
-            else:
-                intersection = job_core_lemmas.intersection(profile_lemmas)
-                raw_overlap = len(intersection) / len(job_core_lemmas)
+    def _profile_features_many(self, profiles):
+        """
+        Returns cached features for each profile (DB object or parsed resume dict),
+        featurizing all cache misses in one batch.
+        """
+        features = [None] * len(profiles)
+        misses = []
+        for idx, profile in enumerate(profiles):
+            profile_text = self._construct_profile_text(profile)
+            text_hash = content_hash(profile_text)
+            key = self._profile_cache_key(profile, text_hash)
+            features[idx] = self.profile_cache.get(key, text_hash)
+            if features[idx] is None:
+                misses.append((idx, key, text_hash, profile_text))
+
+        if misses:
+            new_features = self.featurize_batch([text for _, _, _, text in misses])
+            for (idx, key, text_hash, _), profile_features in zip(misses, new_features):
+                features[idx] = profile_features
+                self.profile_cache.set(key, text_hash, profile_features)
+        return features
+
+    def _profile_features(self, profile):
+        return self._profile_features_many([profile])[0]
+
+    def warm_features(self, jobs=None, profiles=None):
+        """
+        Pre-computes and caches features for many jobs and profiles in bulk.
+        """
+        if jobs:
+            self._job_features_many(jobs)
+        if profiles:
+            self._profile_features_many([p for p in profiles if p is not None])
 
-                # CURVE THE SCORE:
-                # Matching 60% of tags is usually "Excellent". Matching 100% is rare.
-                # We multiply by 1.5 to boost good candidates (e.g., 0.6 -> 0.9).
-                keyword_score = min(raw_overlap * 1.5, 1.0)
+    def invalidate_profile(self, profile_id):
+        """
+        Drops cached features for a profile. Call after any profile write.
+        """
+        self.profile_cache.invalidate(('profile', profile_id))
 
-            # --- SEMANTIC CONTEXT MATCH (The "Soft" Skills) ---
-            # This uses the vectors to understand context (e.g. "Coding" ~ "Development")
+    def invalidate_job(self, job_id):
+        """
+        Drops cached features for a job. Call after a job is edited or deleted.
+        """
+        self.job_cache.invalidate(job_id)
+        self.job_index.remove(job_id)
 
-            profile_vec_text = self._construct_profile_text(profile)
-            job_vec_text = self._construct_job_text_for_vector(job) # Includes description
+    def index_job(self, job):
+        """
+        Inserts (or refreshes) one job in the ANN index.
+        """
+        features = self._job_features(job)
+        self.job_index.add(job.id, features.vector, tag=self.job_hash(job))
+        self._schedule_index_training()
 
-            # Safety check: ensure both texts are non-empty
-            if not profile_vec_text or not job_vec_text:
-                semantic_score = 0.0
-                raw_semantic = 0.0
-            else:
-                doc_profile = self.nlp(self._clean_text(profile_vec_text[:100000]))
-                doc_job = self.nlp(self._clean_text(job_vec_text[:100000]))
+    def _schedule_index_training(self):
+        # k-means never runs inside a request
+        task_queue.enqueue(('job_index_train',), self.job_index.maybe_train)
 
-                raw_semantic = doc_profile.similarity(doc_job)
+    def sync_job_index(self, jobs):
+        """
+        Brings the ANN index in line with `jobs`: indexes new or edited jobs and drops
+        deleted ones. Cheap when nothing changed (one hash per job).
+        """
+        current_ids = {job.id for job in jobs}
+        for job_id in self.job_index.keys() - current_ids:
+            self.job_index.remove(job_id)
+
+        job_hashes = {job.id: self.job_hash(job) for job in jobs}
+        stale = [job for job in jobs if self.job_index.tag(job.id) != job_hashes[job.id]]
+        for job, features in zip(stale, self._job_features_many(stale)):
+            self.job_index.add(job.id, features.vector, tag=job_hashes[job.id])
+        if stale:
+            self._schedule_index_training()
+
+    def ensure_job_index(self, load_jobs):
+        """
+        Fills the ANN index from load_jobs() the first time it is needed; afterwards the
+        job create/edit/delete hooks keep it current, so no request re-reads the job table.
+        """
+        with self._job_index_lock:
+            if not self._job_index_synced:
+                self.sync_job_index(load_jobs())
+                self._job_index_synced = True
 
-            # Normalize Vector Score:
-            # Vectors are generous. 0.7 is a baseline for "Professional English".
-            # We map 0.6 -> 0.0 and 0.95 -> 1.0
-            semantic_score = max(0, (raw_semantic - 0.6) * 2.5)
-            semantic_score = min(semantic_score, 1.0)
+    def shortlist_job_ids(self, profile, n_candidates=None, n_probe=None):
+        """
+        Ids of the jobs whose vectors are nearest to the profile in the ANN index, so exact
+        scoring only runs on that candidate set. Returns None if the profile has no usable
+        vector (or the search fails); the caller then scores every job.
+        """
+        try:
+            profile_features = self._profile_features(profile)
+            hits = self.job_index.search(profile_features.vector, n_candidates or Config.ANN_CANDIDATES, n_probe)
+            return [job_id for job_id, _ in hits] or None
+        except Exception as e:
+            print(f"Error searching job index: {e}")
+            return None
+
+    def _keyword_scores(self, profile_lemmas, job_features):
+        n_jobs = len(job_features)
+
+        # --- 1. CORE KEYWORD MATCH (The "Hard" Skills) ---
+        # We derive the "Must Haves" strictly from Job Title and Tags.
+        # We ignore the description body for this part to avoid noise.
+        core_sizes = np.fromiter((len(f.lemmas) for f in job_features), dtype=np.float64, count=n_jobs)
+        overlaps = np.fromiter((len(f.lemmas & profile_lemmas) for f in job_features), dtype=np.float64, count=n_jobs)
+        raw_overlap = np.divide(overlaps, core_sizes, out=np.zeros(n_jobs), where=core_sizes > 0)
+        return self._curve_keyword_scores(raw_overlap)
+
+    def _curve_keyword_scores(self, raw_overlap):
+        # CURVE THE SCORE:
+        # Matching 60% of tags is usually "Excellent". Matching 100% is rare.
+        # We multiply by 1.5 to boost good candidates (e.g., 0.6 -> 0.9).
+        return np.minimum(raw_overlap * 1.5, 1.0)
+
+    def _semantic_scores(self, profile_features, job_features):
+        n_jobs = len(job_features)
+
+        # --- 2. SEMANTIC CONTEXT MATCH (The "Soft" Skills) ---
+        # This uses the vectors to understand context (e.g. "Coding" ~ "Development").
+        # Cosine similarity for every job in one matrix-vector product (same formula as Doc.similarity).
+        # An empty profile has a zero vector, which scores 0.0 here.
+        job_matrix = np.vstack([f.vector for f in job_features])
+        job_norms = np.fromiter((f.vector_norm for f in job_features), dtype=np.float64, count=n_jobs)
+        denominators = job_norms * profile_features.vector_norm
+        raw_semantic = np.divide(job_matrix @ profile_features.vector, denominators,
+                                 out=np.zeros(n_jobs), where=denominators > 0)
+        return self._normalize_semantic_scores(raw_semantic)
+
+    def _normalize_semantic_scores(self, raw_semantic):
+        # Normalize Vector Score:
+        # Vectors are generous. 0.7 is a baseline for "Professional English".
+        # We map 0.6 -> 0.0 and 0.95 -> 1.0
+        return np.clip((raw_semantic - 0.6) * 2.5, 0.0, 1.0)
+
+    def _combine_scores(self, keyword_scores, semantic_scores):
+        # --- 3. FINAL WEIGHTED SCORE ---
+        # If the candidate has the KEYWORDS, we trust them highly (65% weight).
+        # The Vector context helps separate good resumes from keyword stuffing (35% weight).
+        final_scores = (keyword_scores * 0.65) + (semantic_scores * 0.35)
+
+        # --- 4. ADJUSTMENTS ---
+
+        # PENALTY: The "Nurse applying for SEO Specialist" case.
+        # If they miss almost ALL core keywords, the semantic score is likely a hallucination/noise.
+        final_scores = np.where(keyword_scores < 0.2, final_scores * 0.4, final_scores) # Crush the score.
+
+        # BOOST: The "Expert" case.
+        # If they matched > 80% of tags (after curve), they are definitely a strong fit.
+        final_scores = np.where(keyword_scores > 0.8, np.maximum(final_scores, 0.85), final_scores)
+
+        return final_scores
+
+    def _score_features_many(self, profile_features, job_features):
+        """
+        Applies the scoring formula to one profile and many jobs at once.
+        Returns a NumPy array of unrounded scores in the 0.0 - 1.0 range.
+        """
+        return self._combine_scores(
+            self._keyword_scores(profile_features.lemmas, job_features),
+            self._semantic_scores(profile_features, job_features)
+        )
 
-            # --- 3. FINAL WEIGHTED SCORE ---
-            # If the candidate has the KEYWORDS, we trust them highly (65% weight).
-            # The Vector context helps separate good resumes from keyword stuffing (35% weight).
+    def to_percent(self, final_score):
+        """Converts a 0.0 - 1.0 score to the 0 - 98 scale shown to users."""
+        return float(min(round(final_score * 100, 1), 98.0))
 
-            final_score = (keyword_score * 0.65) + (semantic_score * 0.35)
+    def score_many(self, profile, jobs):
+        """
+        Scores one profile against many jobs in a single vectorized pass.
+        Returns a list of scores (0 - 98) in the same order as `jobs`.
+        """
+        if not jobs:
+            return []
+        try:
+            if not self.nlp or not self.nlp.vocab:
+                return [0.0] * len(jobs)
 
-            # --- 4. ADJUSTMENTS ---
+            profile_features = self._profile_features(profile)
+            job_features = self._job_features_many(jobs)
+            final_scores = self._score_features_many(profile_features, job_features)
+            return [self.to_percent(score) for score in final_scores.tolist()]
 
-            # PENALTY: The "Nurse applying for SEO Specialist" case.
-            # If they miss almost ALL core keywords, the semantic score is likely a hallucination/noise.
-            if keyword_score < 0.2:
-                final_score *= 0.4 # Crush the score.
+        except Exception as e:
+            print(f"Error calculating scores: {e}")
+            return [0.0] * len(jobs)
 
-            # BOOST: The "Expert" case.
-            # If they matched > 80% of tags (after curve), they are definitely a strong fit.
-            if keyword_score > 0.8:
-                final_score = max(final_score, 0.85)
+    def top_k(self, profile, jobs, k, min_score=None, known_scores=None):
+        """
+        Returns the k best (job, score) pairs, in the same order as sorting score_many's
+        output (score descending, then original position), plus pruning stats.
+        Keyword overlap is cheap and the semantic term carries at most 35% weight, so a
+        job whose score with a perfect semantic match still cannot reach the current k-th
+        best (or exceed min_score, which is exclusive) is skipped without computing it.
+        known_scores: optional {job_id: score} of exact scores, e.g. from the score table.
+        """
+        known_scores = known_scores or {}
+        stats = {'total': len(jobs), 'known': 0, 'scored': 0, 'pruned': 0}
+        if not jobs or k <= 0:
+            return [], stats
+
+        heap = [] # Min-heap of (score, -position) holding the current k best
+        floor = min_score if min_score is not None else -math.inf
+
+        def push(score, idx):
+            if score <= floor:
+                return
+            entry = (score, -idx)
+            if len(heap) < k:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+        def threshold():
+            # A job whose upper bound is below this cannot enter the ranking
+            return max(heap[0][0], floor) if len(heap) == k else floor
 
-            return float(min(round(final_score * 100, 1), 98.0))
+        try:
+            unknown = []
+            for idx, job in enumerate(jobs):
+                if job.id in known_scores:
+                    push(known_scores[job.id], idx)
+                    stats['known'] += 1
+                else:
+                    unknown.append(idx)
+
+            if unknown:
+                profile_features = self._profile_features(profile)
+                lemma_features = self._job_features_many([jobs[idx] for idx in unknown], with_vectors=False)
+                keyword_scores = self._keyword_scores(profile_features.lemmas, lemma_features)
+                upper_bounds = [
+                    self.to_percent(score)
+                    for score in self._combine_scores(keyword_scores, np.ones(len(unknown))).tolist()
+                ]
+
+                # Visit the most promising jobs first so the threshold rises quickly
+                order = sorted(range(len(unknown)), key=lambda i: (-upper_bounds[i], unknown[i]))
+                batch_size = max(k, Config.SPACY_BATCH_SIZE)
+                pos = 0
+                while pos < len(order):
+                    limit = threshold()
+                    if upper_bounds[order[pos]] < limit or upper_bounds[order[pos]] <= floor:
+                        break # Sorted by bound, so no remaining job can qualify
+                    batch = [i for i in order[pos:pos + batch_size] if upper_bounds[i] >= limit]
+                    pos += batch_size
+
+                    batch_jobs = [jobs[unknown[i]] for i in batch]
+                    scores = self._score_features_many(profile_features, self._job_features_many(batch_jobs))
+                    for i, score in zip(batch, scores.tolist()):
+                        push(self.to_percent(score), unknown[i])
+                    stats['scored'] += len(batch)
+
+                stats['pruned'] = len(unknown) - stats['scored']
 
         except Exception as e:
-            print(f"Error calculating score: {e}")
-            return 0.0
+            print(f"Error ranking jobs: {e}")
+            heap = []
+            for idx, score in enumerate(self.score_many(profile, jobs)):
+                push(score, idx)
+
+        ranked = sorted(heap, reverse=True)
+        return [(jobs[-neg_idx], score) for score, neg_idx in ranked], stats
+
+    def calculate_score(self, profile, job):
+        return self.score_many(profile, [job])[0]
+
+    def job_from_description(self, description, title=None, tags=None):
+        """
+        Wraps a pasted job description as an (unsaved) job the scorer can use.
+        Without a title or tags, the whole description supplies the core keywords.
+        """
+        if not title and not tags:
+            tags = description
+        return SimpleNamespace(id=None, title=title or "", tags=tags, description=description)
+
+    def score_against_job(self, job_features, matrix, norms, overlaps):
+        """
+        Scores many profiles against one job (_score_features_many with the roles of the two
+        sides swapped). Profiles are given as stacked vectors (matrix, norms) and the number
+        of the job's core lemmas each one contains.
+        Returns (final, keyword, semantic) arrays of 0.0 - 1.0 scores.
+        """
+        raw_overlap = overlaps / len(job_features.lemmas) if job_features.lemmas else overlaps
+        keyword_scores = self._curve_keyword_scores(raw_overlap)
+
+        denominators = norms * job_features.vector_norm
+        raw_semantic = np.divide(matrix @ job_features.vector, denominators,
+                                 out=np.zeros(len(norms)), where=denominators > 0)
+        semantic_scores = self._normalize_semantic_scores(raw_semantic)
+
+        return self._combine_scores(keyword_scores, semantic_scores), keyword_scores, semantic_scores
+
+    def score_texts(self, texts, job):
+        """
+        Scores many raw resume texts against one job: all texts are featurized in one
+        batch and scored with one matrix-vector product.
+        Returns (final, keyword, semantic, lemma sets, job lemmas); scores are 0.0 - 1.0 arrays.
+        """
+        n_texts = len(texts)
+        job_features = self._job_features(job)
+        profile_features = self.featurize_batch(texts)
+        if not n_texts:
+            empty = np.zeros(0)
+            return empty, empty, empty, [], job_features.lemmas
+
+        overlaps = np.fromiter((len(f.lemmas & job_features.lemmas) for f in profile_features),
+                               dtype=np.float64, count=n_texts)
+        matrix = np.vstack([f.vector for f in profile_features])
+        norms = np.fromiter((f.vector_norm for f in profile_features), dtype=np.float64, count=n_texts)
+        final_scores, keyword_scores, semantic_scores = self.score_against_job(job_features, matrix, norms, overlaps)
+        return final_scores, keyword_scores, semantic_scores, [f.lemmas for f in profile_features], job_features.lemmas
 
     def parse_resume_with_llm(self, text):
         """
@@ -204,7 +646,7 @@ class MatchingService:
         }
         """
         try:
-            response_text = llm_service.generate_text(system_prompt, f"Resume Text:\n{text[:10000]}")
+            response_text = llm_service.generate_text(system_prompt, f"Resume Text:\n{text[:10000]}", validate=is_json)
             if "```" in response_text:
                 response_text = response_text.replace("```json", "").replace("```", "")
             return json.loads(response_text)
@@ -212,11 +654,15 @@ class MatchingService:
             print(f"LLM Parsing Error: {e}")
             return {}
 
-    def generate_explanation(self, profile, job, score):
-        # Using the same construction logic as calculation for consistency
-        profile_text = self._construct_profile_text(profile)
-        job_text = self._construct_job_text_for_vector(job)
+    def _strip_code_fences(self, response_text):
+        if "```" in response_text:
+            response_text = response_text.replace("```json", "").replace("```", "")
+        return response_text
 
+    def _explain_texts(self, profile_text, job_text, score):
+        """
+        One strengths/missing/verdict analysis as a JSON string. Raises if the LLM call fails.
+        """
         system_prompt = f"""
         You are an expert HR Recruiter.
         Compare the candidate profile and the job description.
@@ -230,11 +676,16 @@ class MatchingService:
 
         user_prompt = f"CANDIDATE PROFILE:\n{profile_text[:3000]}\n\nJOB DESCRIPTION:\n{job_text[:3000]}"
 
+        response_text = llm_service.generate_text(system_prompt, user_prompt, validate=is_json)
+        return self._strip_code_fences(response_text)
+
+    def generate_explanation(self, profile, job, score):
+        # Using the same construction logic as calculation for consistency
+        profile_text = self._construct_profile_text(profile)
+        job_text = self._construct_job_text_for_vector(job)
+
         try:
-            response_text = llm_service.generate_text(system_prompt, user_prompt)
-            if "```" in response_text:
-                response_text = response_text.replace("```json", "").replace("```", "")
-            return response_text
+            return self._explain_texts(profile_text, job_text, score)
         except Exception as e:
             print(f"Error generating explanation: {e}")
             return json.dumps({
@@ -243,4 +694,93 @@ class MatchingService:
                 "verdict": "Could not generate explanation."
             })
 
+    def _pack_explanation_batches(self, entries):
+        """
+        Greedily groups (key, profile_text, score) entries so that each batch stays
+        within EXPLANATION_BATCH_TOKENS and EXPLANATION_BATCH_SIZE.
+        """
+        batches, batch, used = [], [], 0
+        for entry in entries:
+            cost = estimate_tokens(entry[1]) + 20 # Candidate header and answer overhead
+            if batch and (used + cost > Config.EXPLANATION_BATCH_TOKENS or len(batch) >= Config.EXPLANATION_BATCH_SIZE):
+                batches.append(batch)
+                batch, used = [], 0
+            batch.append(entry)
+            used += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _explain_batch(self, batch, job_text):
+        """
+        Explains several candidates for the same job in one LLM call.
+        Returns {key: json_string} for the candidates the model answered properly.
+        """
+        system_prompt = """
+        You are an expert HR Recruiter.
+        Compare each candidate profile below with the job description. Each candidate has an id
+        and a calculated match score out of 100.
+
+        Provide a strict JSON object (no markdown) mapping every candidate id to an object with:
+        - "strengths": List of anywhere between 0 to 4 matching skills or experiences (if score is high, then more points here).
+        - "missing": List of anywhere between 0 to 4 key requirements missing from the profile (if score is low, then more points here).
+        - "verdict": A 1-sentence summary of why this score was given.
+        """
+
+        candidates = "\n\n".join(
+            f"CANDIDATE {key} (match score {score}/100):\n{profile_text}"
+            for key, profile_text, score in batch
+        )
+        user_prompt = f"JOB DESCRIPTION:\n{job_text}\n\n{candidates}"
+
+        try:
+            response = json.loads(self._strip_code_fences(llm_service.generate_text(system_prompt, user_prompt, validate=is_json)))
+        except Exception as e:
+            print(f"Error generating batched explanations: {e}")
+            return {}
+        if not isinstance(response, dict):
+            return {}
+
+        results = {}
+        for key, _, _ in batch:
+            item = response.get(str(key))
+            if isinstance(item, dict) and all(field in item for field in ('strengths', 'missing', 'verdict')):
+                results[key] = json.dumps(item)
+        return results
+
+    def _explain_one(self, profile_text, job_text, score):
+        try:
+            return json.dumps(json.loads(self._explain_texts(profile_text, job_text, score)))
+        except Exception as e:
+            print(f"Error generating explanation: {e}")
+            return None
+
+    def generate_explanations(self, job, items):
+        """
+        Batched version of generate_explanation for many candidates of one job.
+        items: list of (key, profile, score). Candidates are packed into prompts under a token
+        budget and the prompts run concurrently (EXPLANATION_CONCURRENCY). Candidates a batch
+        answer left out or malformed are retried one by one.
+        Returns {key: json_string}; keys that still failed are omitted.
+        """
+        # Build the texts up front: profiles are DB objects and must not be touched from worker threads
+        job_text = self._construct_job_text_for_vector(job)[:3000]
+        entries = [(key, self._construct_profile_text(profile)[:Config.EXPLANATION_PROFILE_CHARS], score)
+                   for key, profile, score in items]
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=Config.EXPLANATION_CONCURRENCY) as pool:
+            for batch_results in pool.map(lambda batch: self._explain_batch(batch, job_text),
+                                          self._pack_explanation_batches(entries)):
+                results.update(batch_results)
+
+            missing = [entry for entry in entries if entry[0] not in results]
+            if missing:
+                print(f"Retrying {len(missing)} explanations individually...")
+            for (key, _, _), explanation in zip(missing, pool.map(
+                    lambda entry: self._explain_one(entry[1], job_text, entry[2]), missing)):
+                if explanation is not None:
+                    results[key] = explanation
+        return results
+
 matching_service = MatchingService()
\ No newline at end of file
@@ -0,0 +1,125 @@
+import io
+from abc import ABC, abstractmethod
+
+
+class PdfBackend(ABC):
+    """
+    One way of turning PDF bytes into text. Backends are stateless and picklable, so
+    page ranges of the same document can be extracted in different worker processes.
+    open() parses the document once; count_pages() and extract() then work on the result.
+    All three are abstract, so a backend missing one fails when it is instantiated.
+    """
+    name = None
+
+    def available(self):
+        return True
+
+    @abstractmethod
+    def open(self, data):
+        """Parses PDF bytes into this backend's document object."""
+
+    @abstractmethod
+    def count_pages(self, document):
+        """Returns the number of pages of an opened document."""
+
+    @abstractmethod
+    def extract(self, document, start, stop):
+        """
+        Returns the text of pages [start, stop) of an opened document as a list of strings.
+        """
+
+    def page_count(self, data):
+        return self.count_pages(self.open(data))
+
+    def extract_pages(self, data, start, stop):
+        return self.extract(self.open(data), start, stop)
+
+
+class PypdfBackend(PdfBackend):
+    """pypdf: pure Python, always installed (default)."""
+    name = 'pypdf'
+
+    def open(self, data):
+        from pypdf import PdfReader
+        return PdfReader(io.BytesIO(data))
+
+    def count_pages(self, reader):
+        return len(reader.pages)
+
+    def extract(self, reader, start, stop):
+        return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+class PdfminerBackend(PdfBackend):
+    """pdfminer.six: slower, better layout handling (optional dependency)."""
+    name = 'pdfminer'
+
+    def available(self):
+        try:
+            import pdfminer.high_level
+            return True
+        except ImportError:
+            return False
+
+    def open(self, data):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+        return list(PDFPage.create_pages(PDFDocument(PDFParser(io.BytesIO(data)))))
+
+    def count_pages(self, pages):
+        return len(pages)
+
+    def extract(self, pages, start, stop):
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        manager = PDFResourceManager()
+        texts = []
+        for page in pages[start:stop]:
+            output = io.StringIO()
+            device = TextConverter(manager, output, laparams=LAParams())
+            PDFPageInterpreter(manager, device).process_page(page)
+            device.close()
+            texts.append(output.getvalue())
+        return texts
+
+
+class PymupdfBackend(PdfBackend):
+    """PyMuPDF: C library, usually the fastest (optional dependency, AGPL)."""
+    name = 'pymupdf'
+
+    def available(self):
+        try:
+            import fitz
+            return True
+        except ImportError:
+            return False
+
+    def open(self, data):
+        import fitz
+        return fitz.open(stream=data, filetype='pdf')
+
+    def count_pages(self, doc):
+        return doc.page_count
+
+    def extract(self, doc, start, stop):
+        return [doc[i].get_text() for i in range(start, stop)]
+
+
+PDF_BACKENDS = {backend.name: backend for backend in (PypdfBackend(), PdfminerBackend(), PymupdfBackend())}
+
+
+def available_backends():
+    return [name for name, backend in PDF_BACKENDS.items() if backend.available()]
+
+
+def get_backend(name):
+    """
+    Returns the named backend, falling back to pypdf if it is unknown or not installed.
+    """
+    backend = PDF_BACKENDS.get(name)
+    if backend is None or not backend.available():
+        print(f"PDF backend '{name}' is not available, using pypdf.")
+        return PDF_BACKENDS['pypdf']
+    return backend
@@ -0,0 +1,406 @@
+import atexit
+import hashlib
+import os
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from ..config import Config
+from .pdf_backends import PDF_BACKENDS, available_backends, get_backend
+from .scoring_pool import in_main_process
+
+
+class ExtractionResult:
+    """
+    Text of one file, or the ValueError explaining why it could not be read.
+    `complete` is False when pages were cut off by the deadline.
+    """
+    def __init__(self, text="", error=None, complete=True):
+        self.text = text
+        self.error = error
+        self.complete = complete
+
+
+def _decode_text(data):
+    try:
+        return ExtractionResult(data.decode('utf-8'))
+    except UnicodeDecodeError:
+        return ExtractionResult(error=ValueError("File format not supported. Please upload PDF or text file."))
+
+
+def extract_text(data, filename, backend_name='pypdf', max_pages=20, max_bytes=None, deadline=None):
+    """
+    Extracts plain text from resume file bytes (PDF, otherwise UTF-8 text/markdown)
+    in the current process. At most max_pages pages are read; once `deadline`
+    (a time.monotonic() value) passes, the remaining pages are skipped.
+    Raises ValueError if the file cannot be read.
+    """
+    result = _extract_local(data, filename, backend_name, max_pages, max_bytes, deadline)
+    if result.error:
+        raise result.error
+    return result.text
+
+
+def _too_large(max_bytes):
+    return ExtractionResult(error=ValueError(f"Resume file is too large (limit {max_bytes // 1024} KB)."))
+
+
+def _extract_local(data, filename, backend_name, max_pages, max_bytes, deadline=None, pages_per_step=4):
+    # The size limit applies to every upload, not only PDFs
+    if max_bytes and len(data) > max_bytes:
+        return _too_large(max_bytes)
+    if not filename.lower().endswith('.pdf'):
+        return _decode_text(data)
+
+    backend = PDF_BACKENDS[backend_name]
+    pages = []
+    try:
+        document = backend.open(data)
+        n_pages = min(backend.count_pages(document), max_pages)
+        for start in range(0, n_pages, pages_per_step):
+            if deadline is not None and time.monotonic() > deadline:
+                return ExtractionResult("\n".join(page for page in pages if page), complete=False)
+            pages.extend(backend.extract(document, start, min(start + pages_per_step, n_pages)))
+    except Exception as e:
+        return ExtractionResult(error=ValueError(f"Failed to parse PDF: {e}"))
+    return ExtractionResult("\n".join(page for page in pages if page))
+
+
+# Per worker process: the last few opened documents, so the page ranges of one file that
+# run on the same worker parse it only once (a worker runs one task at a time, no lock needed)
+_open_documents = OrderedDict()
+_OPEN_DOCUMENTS_SIZE = 4
+
+
+def _open_document(backend_name, digest, data):
+    key = (backend_name, digest)
+    document = _open_documents.get(key)
+    if document is None:
+        document = PDF_BACKENDS[backend_name].open(data)
+        _open_documents[key] = document
+        while len(_open_documents) > _OPEN_DOCUMENTS_SIZE:
+            _open_documents.popitem(last=False)
+    else:
+        _open_documents.move_to_end(key)
+    return document
+
+
+def _extract_first_pages(backend_name, digest, data, n_pages, max_pages):
+    # Worker task: page count plus the first pages from one parse, so short resumes need a single task
+    backend = PDF_BACKENDS[backend_name]
+    document = _open_document(backend_name, digest, data)
+    total = min(backend.count_pages(document), max_pages)
+    return total, backend.extract(document, 0, min(n_pages, total))
+
+
+def _extract_page_range(backend_name, digest, data, start, stop):
+    return PDF_BACKENDS[backend_name].extract(_open_document(backend_name, digest, data), start, stop)
+
+
+def file_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class ResumeTextCache:
+    """
+    Content-addressed cache of extracted resume text, keyed by SHA-256 of the file bytes.
+    Recent entries live in an in-memory LRU; every entry is also written to
+    cache_dir/<version>/<sha256>.txt so it survives restarts and is shared by workers.
+    Bump `version` when the extraction method changes.
+    """
+    def __init__(self, cache_dir, max_size=256, version='v1'):
+        self.cache_dir = os.path.join(cache_dir, version)
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.txt")
+
+    def _remember(self, digest, text):
+        with self._lock:
+            self._entries[digest] = text
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, digest):
+        with self._lock:
+            text = self._entries.get(digest)
+            if text is not None:
+                self._entries.move_to_end(digest)
+                self.memory_hits += 1
+                return text
+
+        try:
+            with open(self._path(digest), 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        self._remember(digest, text)
+        return text
+
+    def set(self, digest, text):
+        self._remember(digest, text)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees a partial file
+            tmp_path = f"{self._path(digest)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(digest))
+        except OSError as e:
+            print(f"Could not write resume text cache entry {digest}: {e}")
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses
+        }
+
+
+def _ping():
+    return True
+
+
+class ResumeExtractor:
+    """
+    Extracts resume text with a pluggable PDF backend (see pdf_backends).
+    pypdf is pure Python and holds the GIL, so PDFs are split into page ranges that
+    are extracted in parallel by a pool of worker processes (one per core by default),
+    both across the files of a batch and across the pages of one long file.
+    Every call is bounded by max_bytes per file, max_pages per file and a wall-clock
+    deadline. At the deadline the call cancels its own queued page ranges and drops their
+    pages; ranges already running finish in their worker and are ignored. Workers are
+    shared by concurrent requests, so they are never killed.
+    Without a pool (max_workers < 2) extraction runs in-process, where the deadline
+    is only checked between page ranges.
+    """
+    def __init__(self, max_workers, backend='pypdf', max_pages=20, max_bytes=10 * 1024 * 1024,
+                 deadline=30, pages_per_task=4, start_method='spawn', cache=None):
+        self.max_workers = max_workers
+        self.backend = get_backend(backend).name
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.deadline = deadline
+        self.pages_per_task = pages_per_task
+        self.start_method = start_method
+        self.cache = cache
+        self._pool = None
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.deadline_exceeded = 0
+        atexit.register(self.shutdown)
+
+    def _use_pool(self):
+        # Worker processes (of any pool) extract in-process rather than start pools of their own
+        return self.max_workers >= 2 and in_main_process()
+
+    def _get_pool(self):
+        """
+        The pool is started on first use, not at app startup.
+        """
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._pool
+
+    def _discard_pool(self, pool):
+        """
+        Drops a broken pool so the next call starts a fresh one. Only `pool` itself is
+        discarded: if another request already replaced it, the new pool is left alone.
+        """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self):
+        """
+        Starts the worker processes ahead of the first batch (spawning them costs seconds).
+        Optional: the pool is otherwise started by the first extraction.
+        """
+        if not self._use_pool():
+            return
+        pool = self._get_pool()
+        for _ in range(self.max_workers):
+            pool.submit(_ping)
+
+    def extract(self, data, filename):
+        """
+        Extracts text from one file, skipping extraction if these exact bytes were seen before.
+        Raises ValueError if the file cannot be read.
+        """
+        digest = file_hash(data) if self.cache is not None else None
+        if digest is not None:
+            text = self.cache.get(digest)
+            if text is not None:
+                return text
+
+        result = self._extract_uncached([(filename, data)])[0]
+        if result.error:
+            raise result.error
+        if digest is not None and result.complete:
+            self.cache.set(digest, result.text)
+        return result.text
+
+    def extract_many(self, files):
+        """
+        files: list of (filename, bytes). Returns the extracted texts in the same order;
+        unreadable files (or files not started before the deadline) yield an empty string.
+        Files already in the text cache are not extracted again.
+        """
+        digests = [file_hash(data) for _, data in files] if self.cache is not None else None
+        texts = [self.cache.get(digest) for digest in digests] if digests else [None] * len(files)
+        misses = [idx for idx, text in enumerate(texts) if text is None]
+
+        results = self._extract_uncached([files[idx] for idx in misses])
+        for idx, result in zip(misses, results):
+            if result.error:
+                print(f"Could not extract text from {files[idx][0]}: {result.error}")
+            texts[idx] = result.text
+            # Truncated or empty results may be transient, so only complete text is cached
+            if digests and result.complete and result.text:
+                self.cache.set(digests[idx], result.text)
+        return texts
+
+    def _extract_uncached(self, files):
+        deadline = time.monotonic() + self.deadline
+        if not self._use_pool():
+            return [self._extract_in_process(data, filename, deadline) for filename, data in files]
+        pool = None
+        try:
+            pool = self._get_pool()
+            return self._extract_parallel(pool, files, deadline)
+        except Exception as e:
+            print(f"Extraction pool unavailable, extracting in-process: {e}")
+            self.failures += 1
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool(pool)
+            return [self._extract_in_process(data, filename, deadline) for filename, data in files]
+
+    def _extract_in_process(self, data, filename, deadline):
+        result = _extract_local(data, filename, self.backend, self.max_pages, self.max_bytes,
+                                deadline, self.pages_per_task)
+        if not result.complete:
+            self.deadline_exceeded += 1
+        return result
+
+    def _extract_parallel(self, pool, files, deadline):
+        """
+        Schedules every file as page-range tasks on the pool: first a task that counts
+        pages and reads the first range, then one task per remaining range.
+        """
+        results = [None] * len(files)
+        pages = {} # file index -> page texts, None for pages not extracted yet
+        pending = {} # future -> (file index, first page of the range or None for the opening task)
+
+        digests = {}
+        for idx, (filename, data) in enumerate(files):
+            if self.max_bytes and len(data) > self.max_bytes:
+                results[idx] = _too_large(self.max_bytes)
+            elif not filename.lower().endswith('.pdf'):
+                results[idx] = _decode_text(data)
+            else:
+                digests[idx] = file_hash(data)
+                future = pool.submit(_extract_first_pages, self.backend, digests[idx], data,
+                                     self.pages_per_task, self.max_pages)
+                pending[future] = (idx, None)
+
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, _ = wait(list(pending), timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                idx, start = pending.pop(future)
+                if results[idx] is not None:
+                    continue # File already failed
+                try:
+                    value = future.result()
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    results[idx] = ExtractionResult(error=ValueError(f"Failed to parse PDF: {e}"))
+                    continue
+
+                if start is None:
+                    total, first_pages = value
+                    pages[idx] = first_pages + [None] * (total - len(first_pages))
+                    data = files[idx][1]
+                    # At most one range per worker, so each worker parses the file at most once
+                    remaining_pages = total - len(first_pages)
+                    step = max(self.pages_per_task, -(-remaining_pages // self.max_workers))
+                    for range_start in range(len(first_pages), total, step):
+                        range_stop = min(range_start + step, total)
+                        future = pool.submit(_extract_page_range, self.backend, digests[idx], data, range_start, range_stop)
+                        pending[future] = (idx, range_start)
+                else:
+                    pages[idx][start:start + len(value)] = value
+
+        if pending:
+            print(f"Resume extraction deadline ({self.deadline}s) exceeded, dropping {len(pending)} page ranges.")
+            self.deadline_exceeded += 1
+            # Only this call's tasks: queued ones are cancelled, running ones are left to finish
+            for future in pending:
+                future.cancel()
+
+        for idx in range(len(files)):
+            if results[idx] is not None:
+                continue
+            if idx not in pages:
+                results[idx] = ExtractionResult(error=ValueError("Resume extraction timed out."), complete=False)
+                continue
+            results[idx] = ExtractionResult(
+                "\n".join(page for page in pages[idx] if page),
+                complete=all(page is not None for page in pages[idx])
+            )
+        return results
+
+    def shutdown(self):
+        self._discard_pool(self._pool)
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'available_backends': available_backends(),
+            'workers': self.max_workers,
+            'running': self._pool is not None,
+            'max_pages': self.max_pages,
+            'max_bytes': self.max_bytes,
+            'deadline_seconds': self.deadline,
+            'deadline_exceeded': self.deadline_exceeded,
+            'failures': self.failures,
+            'text_cache': self.cache.stats() if self.cache is not None else None
+        }
+
+
+resume_extractor = ResumeExtractor(
+    max_workers=Config.RESUME_EXTRACT_WORKERS,
+    backend=Config.PDF_BACKEND,
+    max_pages=Config.PDF_MAX_PAGES,
+    max_bytes=Config.PDF_MAX_BYTES,
+    deadline=Config.RESUME_EXTRACT_DEADLINE,
+    pages_per_task=Config.PDF_PAGES_PER_TASK,
+    start_method=Config.SCORING_START_METHOD
+)
+# Extracted text depends on the backend and page limit, so they version the cache
+resume_extractor.cache = ResumeTextCache(
+    Config.RESUME_TEXT_CACHE_DIR,
+    max_size=Config.RESUME_TEXT_CACHE_SIZE,
+    version=f"{resume_extractor.backend}-{resume_extractor.max_pages}p"
+)
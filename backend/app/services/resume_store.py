@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from ..database import db
+from ..models import ParsedResume, Profile, ResumeIngestion
+from .matching_service import matching_service
+from .resume_extractor import resume_extractor
+from .task_queue import task_queue
+
+
+def resume_text_hash(text):
+    return hashlib.sha256(text.encode('utf-8', errors='ignore')).hexdigest()
+
+
+class ResumeStore:
+    """
+    Structured resume JSON from the LLM parser, persisted in parsed_resumes keyed by
+    the resume text hash and parser prompt version. A resume is only sent to the LLM
+    again when its text or the parser prompt changes.
+    Uploaded resumes are ingested (extracted, parsed, featurized) in the background,
+    so applying to a job only has to look the result up.
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get_parsed(self, text):
+        """
+        Returns the parsed resume dict for `text`, calling the LLM only on a cache miss.
+        Failed parses ({}) are not stored, so they are retried next time.
+        """
+        resume_hash = resume_text_hash(text)
+        version = matching_service.RESUME_PARSER_VERSION
+
+        row = ParsedResume.query.get((resume_hash, version))
+        if row is not None:
+            try:
+                data = json.loads(row.data)
+                self.hits += 1
+                return data
+            except ValueError:
+                pass # Corrupt row: parse again and overwrite it
+
+        self.misses += 1
+        data = matching_service.parse_resume_with_llm(text)
+        if data:
+            try:
+                db.session.merge(ParsedResume(resume_hash=resume_hash, parser_version=version, data=json.dumps(data)))
+                db.session.commit()
+            except IntegrityError:
+                # Another request stored the same resume first
+                db.session.rollback()
+        return data
+
+    def _read_resume_text(self, resume):
+        # Profile.resume is stored as "/uploads/filename"
+        filename = os.path.basename(resume)
+        file_path = os.path.join(current_app.root_path, 'uploads', filename)
+        if not os.path.exists(file_path):
+            raise ValueError("Resume file not found")
+        with open(file_path, 'rb') as f:
+            return resume_extractor.extract(f.read(), filename)
+
+    def parsed_for_profile(self, profile):
+        """
+        Returns the parsed resume of a profile, or None if it has no usable resume.
+        Uses the ingestion result when ready; otherwise extracts and parses inline
+        (both steps are cached, so this is only slow for a never-seen resume).
+        """
+        if not profile or not profile.resume:
+            return None
+
+        ingestion = profile.resume_ingestion
+        if ingestion and ingestion.status == 'ready' and ingestion.resume == profile.resume:
+            row = ParsedResume.query.get((ingestion.text_hash, matching_service.RESUME_PARSER_VERSION))
+            if row is not None:
+                return json.loads(row.data)
+
+        resume_text = self._read_resume_text(profile.resume)
+        if not resume_text.strip():
+            return None
+        return self.get_parsed(resume_text) or None
+
+    def schedule_ingestion(self, profile):
+        """
+        Call after a resume upload: marks the profile's resume as queued and enqueues ingestion.
+        """
+        ingestion = profile.resume_ingestion
+        if ingestion is None:
+            ingestion = ResumeIngestion(profile_id=profile.id)
+            db.session.add(ingestion)
+        ingestion.resume = profile.resume
+        ingestion.status = 'queued'
+        ingestion.text_hash = None
+        ingestion.error = None
+        db.session.commit()
+        task_queue.enqueue(('resume_ingest', profile.id), self.ingest, profile.id)
+
+    def _set_status(self, ingestion, status, error=None):
+        ingestion.status = status
+        ingestion.error = error
+        db.session.commit()
+
+    def ingest(self, profile_id):
+        """
+        Background step: extract text, parse it with the LLM and precompute its features.
+        """
+        profile = Profile.query.get(profile_id)
+        ingestion = profile.resume_ingestion if profile else None
+        if ingestion is None or ingestion.resume != profile.resume:
+            return
+
+        try:
+            self._set_status(ingestion, 'extracting')
+            resume_text = self._read_resume_text(profile.resume)
+            if not resume_text.strip():
+                self._set_status(ingestion, 'failed', 'Could not extract text from file.')
+                return
+
+            self._set_status(ingestion, 'parsing')
+            resume_data = self.get_parsed(resume_text)
+            if not resume_data:
+                self._set_status(ingestion, 'failed', 'Resume parsing failed.')
+                return
+
+            self._set_status(ingestion, 'featurizing')
+            matching_service.warm_features(profiles=[resume_data])
+
+            ingestion.text_hash = resume_text_hash(resume_text)
+            self._set_status(ingestion, 'ready')
+            print(f"Ingested resume for profile {profile_id}.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error ingesting resume for profile {profile_id}: {e}")
+            self._set_status(ingestion, 'failed', str(e))
+
+    def ingestion_status(self, profile):
+        ingestion = profile.resume_ingestion
+        if ingestion is None or ingestion.resume != profile.resume:
+            return {'status': 'not_ingested', 'resume_url': profile.resume}
+        return {
+            'status': ingestion.status,
+            'resume_url': ingestion.resume,
+            'error': ingestion.error,
+            'updated_at': ingestion.updated_at.isoformat() if ingestion.updated_at else None
+        }
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+resume_store = ResumeStore()
@@ -0,0 +1,222 @@
+from ..database import db
+from ..config import Config
+from ..models import MatchScore, Job, Profile, Application
+from .matching_service import matching_service
+from .candidate_index import candidate_index
+from .resume_store import resume_store
+from .task_queue import task_queue
+
+
+class ScoreStore:
+    """
+    Persisted (profile, job) match scores in the match_scores table.
+    Each row records the scorer version and hashes of the profile/job text it was
+    computed from; a row is only trusted while all three still match.
+    """
+
+    def _is_fresh(self, row, version, profile_hash, job_hash):
+        return row.scorer_version == version and row.profile_hash == profile_hash and row.job_hash == job_hash
+
+    def _fresh_scores(self, profile, jobs):
+        """
+        Returns {job_id: score} for the persisted rows of `jobs` that are still valid,
+        using a single indexed query on (profile_id, job_id).
+        """
+        version = matching_service.scorer_version
+        profile_hash = matching_service.profile_hash(profile)
+        job_hashes = {job.id: matching_service.job_hash(job) for job in jobs}
+
+        rows = MatchScore.query.filter(
+            MatchScore.profile_id == profile.id,
+            MatchScore.job_id.in_(list(job_hashes))
+        ).all()
+        return {
+            row.job_id: row.score for row in rows
+            if self._is_fresh(row, version, profile_hash, job_hashes[row.job_id])
+        }
+
+    def get_scores(self, profile, jobs):
+        """
+        Returns match scores for `jobs` (same order) using a single indexed query.
+        Missing or stale rows are scored in one vectorized pass for this response
+        and persisted by a background recomputation.
+        """
+        if not jobs:
+            return []
+
+        scores = self._fresh_scores(profile, jobs)
+
+        missing = [job for job in jobs if job.id not in scores]
+        if missing:
+            for job, score in zip(missing, matching_service.score_many(profile, missing)):
+                scores[job.id] = score
+            task_queue.enqueue(('profile_scores', profile.id), self.recompute_profile, profile.id)
+
+        return [scores[job.id] for job in jobs]
+
+    def candidate_jobs(self, profile):
+        """
+        Jobs worth scoring for a recommendation: all of them on small boards; on large ones
+        (ANN_MIN_JOBS or more) only the ANN shortlist, loaded by id.
+        """
+        if Job.query.count() < Config.ANN_MIN_JOBS:
+            return Job.query.all()
+        matching_service.ensure_job_index(lambda: Job.query.all())
+        job_ids = matching_service.shortlist_job_ids(profile)
+        if not job_ids:
+            return Job.query.all()
+        return Job.query.filter(Job.id.in_(job_ids)).all()
+
+    def top_k(self, profile, jobs, k, min_score=None):
+        """
+        Top-k ranking over `jobs`: fresh persisted scores are used as-is and the
+        remaining jobs go through MatchingService.top_k with upper-bound pruning.
+        Returns ([(job, score), ...], stats).
+        """
+        known = self._fresh_scores(profile, jobs)
+
+        ranked, stats = matching_service.top_k(profile, jobs, k, min_score=min_score, known_scores=known)
+        if len(known) < len(jobs):
+            task_queue.enqueue(('profile_scores', profile.id), self.recompute_profile, profile.id)
+        return ranked, stats
+
+    def _refresh(self, profile, jobs):
+        """
+        Recomputes and upserts only the rows for `jobs` that are missing or stale.
+        """
+        if not jobs:
+            return 0
+
+        profile_hash = matching_service.profile_hash(profile)
+        job_hashes = {job.id: matching_service.job_hash(job) for job in jobs}
+
+        existing = {
+            row.job_id: row for row in MatchScore.query.filter(
+                MatchScore.profile_id == profile.id,
+                MatchScore.job_id.in_(list(job_hashes))
+            ).all()
+        }
+        version = matching_service.scorer_version
+        stale = [
+            job for job in jobs
+            if job.id not in existing or not self._is_fresh(existing[job.id], version, profile_hash, job_hashes[job.id])
+        ]
+        if not stale:
+            return 0
+
+        scores = matching_service.score_many(profile, stale)
+        # Scoring loads the model, which decides whether this is the blank fallback
+        version = matching_service.scorer_version
+        for job, score in zip(stale, scores):
+            row = existing.get(job.id)
+            if row is None:
+                row = MatchScore(profile_id=profile.id, job_id=job.id)
+                db.session.add(row)
+            row.score = score
+            row.scorer_version = version
+            row.profile_hash = profile_hash
+            row.job_hash = job_hashes[job.id]
+        return len(stale)
+
+    def _refresh_job(self, job):
+        """
+        Recomputes one job's score for every candidate profile in one vectorized pass
+        (CandidateIndex keeps the profile features and hashes) and upserts only the rows
+        that are missing or stale.
+        """
+        scored = candidate_index.score_job(job)
+        version = matching_service.scorer_version
+        job_hash = matching_service.job_hash(job)
+        existing = {row.profile_id: row for row in MatchScore.query.filter_by(job_id=job.id).all()}
+
+        updated = 0
+        for profile_id, profile_hash, score in scored:
+            row = existing.get(profile_id)
+            if row is not None and self._is_fresh(row, version, profile_hash, job_hash):
+                continue
+            if row is None:
+                row = MatchScore(profile_id=profile_id, job_id=job.id)
+                db.session.add(row)
+            row.score = score
+            row.scorer_version = version
+            row.profile_hash = profile_hash
+            row.job_hash = job_hash
+            updated += 1
+        return updated
+
+    def recompute_profile(self, profile_id):
+        """
+        Background step: refresh every stale score of one profile.
+        """
+        profile = Profile.query.get(profile_id)
+        if not profile:
+            return
+        try:
+            updated = self._refresh(profile, Job.query.all())
+            db.session.commit()
+            if updated:
+                print(f"Recomputed {updated} match scores for profile {profile_id}.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error recomputing match scores for profile {profile_id}: {e}")
+
+    def recompute_job(self, job_id):
+        """
+        Background step: re-index one job and refresh its score for every candidate profile.
+        """
+        job = Job.query.get(job_id)
+        if not job:
+            return
+        try:
+            matching_service.index_job(job)
+            updated = self._refresh_job(job)
+            db.session.commit()
+            if updated:
+                print(f"Recomputed {updated} match scores for job {job_id}.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error recomputing match scores for job {job_id}: {e}")
+
+    def finalize_application(self, application_id):
+        """
+        Background step: replaces an application's provisional (DB profile) score with
+        the score of the candidate's uploaded resume, and marks it final.
+        """
+        application = Application.query.get(application_id)
+        if not application or application.score_status == 'final':
+            return
+        profile = application.user.profile
+        try:
+            score = application.match_score
+            resume_data = resume_store.parsed_for_profile(profile)
+            if resume_data:
+                score = matching_service.calculate_score(resume_data, application.job)
+                print(f"Calculated score {score} using uploaded resume.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error parsing resume file for application {application_id}: {e}")
+            # Keep the profile-based score
+
+        if score != application.match_score:
+            application.match_score = score
+            application.match_explanation = None # Explanations quote the score; regenerate on demand
+        application.score_status = 'final'
+        db.session.commit()
+
+    def profile_changed(self, profile_id):
+        """
+        Call after any profile write: evicts cached features and schedules recomputation.
+        """
+        matching_service.invalidate_profile(profile_id)
+        candidate_index.mark_dirty(profile_id)
+        task_queue.enqueue(('profile_scores', profile_id), self.recompute_profile, profile_id)
+
+    def job_changed(self, job_id):
+        """
+        Call after a job is created or edited: evicts cached features and schedules recomputation.
+        """
+        matching_service.invalidate_job(job_id)
+        task_queue.enqueue(('job_scores', job_id), self.recompute_job, job_id)
+
+
+score_store = ScoreStore()
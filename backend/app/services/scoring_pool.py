@@ -0,0 +1,130 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def in_main_process():
+    """
+    False inside pool workers, including while a spawned worker is still importing the
+    main module (multiprocessing.parent_process() is only set after that bootstrap).
+    """
+    return multiprocessing.current_process().name == 'MainProcess'
+
+
+def _init_worker():
+    # Each worker process holds its own loaded spaCy model
+    from .matching_service import matching_service
+    matching_service._load_model()
+
+
+def _ping():
+    return True
+
+
+def _featurize_in_worker(texts, with_lemmas):
+    from .matching_service import matching_service
+    return matching_service._featurize_local(texts, with_lemmas)
+
+
+class ScoringExecutor:
+    """
+    Optional pool of worker processes for the CPU-bound spaCy part of matching.
+    spaCy holds the GIL while parsing, so featurizing in separate processes lets
+    concurrent requests scale with cores. Callers get None back whenever the pool is
+    saturated or unhealthy and are expected to fall back to in-process featurization.
+    """
+    def __init__(self, max_workers, batch_size=64, max_queue=32, timeout=30, start_method='spawn'):
+        self.max_workers = max_workers
+        self.start_method = start_method
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.failures = 0
+        atexit.register(self.shutdown)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # 'spawn' (default) avoids forking a threaded web server mid-request
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker
+                )
+            return self._pool
+
+    def _reserve(self, n_chunks):
+        with self._lock:
+            if self._pending + n_chunks > self.max_queue:
+                return False
+            self._pending += n_chunks
+            return True
+
+    def _release(self, n_chunks):
+        with self._lock:
+            self._pending -= n_chunks
+
+    def _reset_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def warm_up(self):
+        """
+        Starts every worker (and loads its model) ahead of the first request.
+        """
+        pool = self._get_pool()
+        for _ in range(self.max_workers):
+            pool.submit(_ping)
+
+    def featurize(self, texts, with_lemmas=True):
+        """
+        Featurizes texts across the worker pool in chunks of batch_size.
+        Returns None if the queue is full or the pool failed.
+        """
+        chunks = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        if not self._reserve(len(chunks)):
+            self.rejected += 1
+            return None
+
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(_featurize_in_worker, chunk, with_lemmas) for chunk in chunks]
+            features = []
+            for future in futures:
+                features.extend(future.result(timeout=self.timeout))
+            self.completed += 1
+            return features
+        except BrokenProcessPool as e:
+            print(f"Scoring pool crashed, restarting on next use: {e}")
+            self.failures += 1
+            self._reset_pool()
+            return None
+        except Exception as e:
+            print(f"Scoring pool error, falling back to in-process scoring: {e}")
+            self.failures += 1
+            return None
+        finally:
+            self._release(len(chunks))
+
+    def shutdown(self):
+        self._reset_pool()
+
+    def stats(self):
+        return {
+            'workers': self.max_workers,
+            'running': self._pool is not None,
+            'pending_batches': self._pending,
+            'max_queue': self.max_queue,
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'failures': self.failures
+        }
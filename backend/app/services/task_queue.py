@@ -0,0 +1,63 @@
+import queue
+import threading
+
+
+class TaskQueue:
+    """
+    Minimal in-process background worker.
+    Tasks run one at a time on a daemon thread inside the Flask app context, so they
+    can use the database like a request handler. Tasks enqueued with a key that is
+    already waiting are coalesced (e.g. several quick edits to the same profile).
+    """
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending_keys = set()
+        self._lock = threading.Lock()
+        self._app = None
+        self._thread = None
+
+    def init_app(self, app):
+        self._app = app
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, name='task-queue', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, key, func, *args, **kwargs):
+        """
+        Schedules func(*args, **kwargs) to run in the background.
+        Returns False if an identical task (same key) is already waiting.
+        """
+        # Without an app (e.g. CLI scripts), there is no worker: run inline
+        if self._app is None:
+            func(*args, **kwargs)
+            return True
+
+        with self._lock:
+            if key is not None and key in self._pending_keys:
+                return False
+            if key is not None:
+                self._pending_keys.add(key)
+        self._queue.put((key, func, args, kwargs))
+        return True
+
+    def _worker(self):
+        while True:
+            key, func, args, kwargs = self._queue.get()
+            with self._lock:
+                self._pending_keys.discard(key)
+            try:
+                with self._app.app_context():
+                    func(*args, **kwargs)
+            except Exception as e:
+                print(f"Background task {key} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        return {
+            'running': self._thread is not None,
+            'queued': self._queue.qsize()
+        }
+
+
+task_queue = TaskQueue()
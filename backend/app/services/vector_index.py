@@ -0,0 +1,182 @@
+import threading
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index for cosine similarity.
+    Vectors are L2-normalised and assigned to the closest of n_lists k-means centroids;
+    a query only scans the n_probe lists whose centroids are closest to it.
+    n_probe is the recall/latency knob: n_probe == n_lists is an exact full scan.
+    Until train_threshold vectors exist the index stays a single flat list.
+    Searches never train; owners call maybe_train() off the request path after adding vectors.
+    """
+    def __init__(self, n_probe=8, train_threshold=1024, kmeans_iterations=10, seed=0):
+        self.n_probe = n_probe
+        self.train_threshold = train_threshold
+        self.kmeans_iterations = kmeans_iterations
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+        self._vectors = {} # key -> normalised vector
+        self._tags = {} # key -> caller-defined version tag (e.g. content hash), for every added key
+        self._assignments = {} # key -> list id
+        self._lists = [set()]
+        self._list_cache = {} # list id -> (keys, matrix), rebuilt lazily when a list changes
+        self._centroids = None
+        self._trained_size = 0
+        self._training = False
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def __contains__(self, key):
+        return key in self._tags
+
+    def tag(self, key):
+        return self._tags.get(key)
+
+    def vector(self, key):
+        """Returns the stored (normalised) vector of a key, or None."""
+        return self._vectors.get(key)
+
+    def keys(self):
+        # Includes keys whose vector was zero and therefore not searchable
+        return set(self._tags)
+
+    def _nearest_list(self, vector):
+        if self._centroids is None:
+            return 0
+        return int(np.argmax(self._centroids @ vector))
+
+    def add(self, key, vector, tag=None):
+        """
+        Inserts or replaces a vector. Zero vectors are not indexed (they have no direction).
+        """
+        with self._lock:
+            self.remove(key)
+            self._tags[key] = tag
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            if not norm:
+                return False
+            vector = vector / norm
+            list_id = self._nearest_list(vector)
+            self._vectors[key] = vector
+            self._assignments[key] = list_id
+            self._lists[list_id].add(key)
+            self._list_cache.pop(list_id, None)
+            return True
+
+    def remove(self, key):
+        with self._lock:
+            self._tags.pop(key, None)
+            if key not in self._vectors:
+                return
+            list_id = self._assignments.pop(key)
+            self._lists[list_id].discard(key)
+            self._list_cache.pop(list_id, None)
+            del self._vectors[key]
+
+    def _kmeans(self, matrix):
+        """
+        Spherical k-means; returns the centroids.
+        """
+        n_lists = max(1, int(np.sqrt(len(matrix))))
+        centroids = matrix[self._rng.choice(len(matrix), size=n_lists, replace=False)]
+
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(matrix @ centroids.T, axis=1)
+            for list_id in range(n_lists):
+                members = matrix[assignment == list_id]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    norm = np.linalg.norm(centroid)
+                    if norm:
+                        centroids[list_id] = centroid / norm
+        return centroids
+
+    def maybe_train(self):
+        """
+        (Re)trains the lists once train_threshold vectors exist and again whenever the index
+        has doubled since the last training. k-means runs on a copy without holding the lock,
+        so searches continue meanwhile; only the final re-assignment is done under it.
+        Returns True if it trained.
+        """
+        with self._lock:
+            size = len(self._vectors)
+            if self._training or size < self.train_threshold:
+                return False
+            if self._centroids is not None and size <= 2 * self._trained_size:
+                return False
+            self._training = True
+            matrix = np.vstack(list(self._vectors.values()))
+
+        try:
+            centroids = self._kmeans(matrix)
+            with self._lock:
+                # Vectors added or removed during k-means are covered: assign what is there now
+                keys = list(self._vectors)
+                lists = [set() for _ in range(len(centroids))]
+                if keys:
+                    assignment = np.argmax(np.vstack([self._vectors[key] for key in keys]) @ centroids.T, axis=1)
+                    for key, list_id in zip(keys, assignment.tolist()):
+                        self._assignments[key] = list_id
+                        lists[list_id].add(key)
+                self._centroids = centroids
+                self._lists = lists
+                self._list_cache = {}
+                self._trained_size = len(keys)
+            return True
+        finally:
+            self._training = False
+
+    def _list_matrix(self, list_id):
+        cached = self._list_cache.get(list_id)
+        if cached is None:
+            keys = list(self._lists[list_id])
+            matrix = np.vstack([self._vectors[key] for key in keys]) if keys else None
+            cached = (keys, matrix)
+            self._list_cache[list_id] = cached
+        return cached
+
+    def search(self, vector, k, n_probe=None):
+        """
+        Returns up to k (key, cosine similarity) pairs, most similar first.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if not norm or k <= 0:
+            return []
+        vector = vector / norm
+
+        with self._lock:
+            if self._centroids is None:
+                probe_lists = [0]
+            else:
+                n_probe = min(n_probe or self.n_probe, len(self._lists))
+                probe_lists = np.argsort(-(self._centroids @ vector))[:n_probe].tolist()
+
+            keys, blocks = [], []
+            for list_id in probe_lists:
+                list_keys, matrix = self._list_matrix(list_id)
+                if list_keys:
+                    keys.extend(list_keys)
+                    blocks.append(matrix)
+
+        if not keys:
+            return []
+        similarities = np.vstack(blocks) @ vector
+        if len(keys) > k:
+            top = np.argpartition(-similarities, k - 1)[:k]
+        else:
+            top = np.arange(len(keys))
+        top = top[np.argsort(-similarities[top])]
+        return [(keys[i], float(similarities[i])) for i in top]
+
+    def stats(self):
+        return {
+            'size': len(self._vectors),
+            'lists': len(self._lists),
+            'trained': self._centroids is not None,
+            'n_probe': self.n_probe
+        }
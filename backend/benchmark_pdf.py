@@ -0,0 +1,75 @@
+"""
+Micro-benchmark of the resume PDF extraction backends on the sample PDFs in app/uploads/.
+
+    python benchmark_pdf.py [--repeat 5] [--workers 4] [--batch 50]
+
+For every installed backend it reports the median serial extraction time per file,
+then the time to extract a batch of --batch files through the parallel ResumeExtractor.
+"""
+import argparse
+import glob
+import os
+import statistics
+import time
+from app.services.pdf_backends import PDF_BACKENDS, available_backends
+from app.services.resume_extractor import ResumeExtractor, extract_text
+
+
+def time_serial(backend_name, data, repeat):
+    timings = []
+    text = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract_text(data, 'resume.pdf', backend_name=backend_name, max_pages=1000)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), text
+
+
+def time_parallel(backend_name, files, workers):
+    extractor = ResumeExtractor(workers, backend=backend_name, max_pages=1000, deadline=600)
+    try:
+        extractor.warm_up()
+        extractor._extract_uncached(files[:1]) # Wait until the pool is up
+        start = time.perf_counter()
+        extractor._extract_uncached(files)
+        return time.perf_counter() - start
+    finally:
+        extractor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch', type=int, default=50)
+    args = parser.parse_args()
+
+    upload_folder = os.path.join(os.path.dirname(__file__), 'app', 'uploads')
+    paths = sorted(glob.glob(os.path.join(upload_folder, '*.pdf')))
+    if not paths:
+        print(f"No sample PDFs found in {upload_folder}")
+        return
+    samples = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            samples.append((os.path.basename(path), f.read()))
+
+    backends = available_backends()
+    print(f"Backends: {', '.join(backends)} (not installed: {', '.join(set(PDF_BACKENDS) - set(backends)) or 'none'})")
+    print(f"\n{'backend':<10} {'file':<45} {'pages':>5} {'chars':>7} {'median ms':>10}")
+    for backend_name in backends:
+        for filename, data in samples:
+            seconds, text = time_serial(backend_name, data, args.repeat)
+            pages = PDF_BACKENDS[backend_name].page_count(data)
+            print(f"{backend_name:<10} {filename[:45]:<45} {pages:>5} {len(text):>7} {seconds * 1000:>10.1f}")
+
+    batch = [samples[i % len(samples)] for i in range(args.batch)]
+    print(f"\nBatch of {len(batch)} files, {args.workers} workers:")
+    for backend_name in backends:
+        serial = sum(time_serial(backend_name, data, 1)[0] for _, data in batch)
+        parallel = time_parallel(backend_name, batch, args.workers) if args.workers > 1 else serial
+        print(f"{backend_name:<10} serial {serial * 1000:>8.1f} ms   parallel {parallel * 1000:>8.1f} ms   speed-up {serial / parallel:>4.1f}x")
+
+
+if __name__ == '__main__':
+    main()